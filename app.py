@@ -3,32 +3,39 @@ Salon Shop Backend - Flask Application
 Main application file containing all API endpoints
 """
 
+import hashlib
 import math
 import os
 import re
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
 from urllib.parse import quote_plus
 
-from flask import Flask, request, jsonify
+import orjson
+from cachetools import TTLCache
+from flask import Flask, request, jsonify, g
+from flask_caching import Cache
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager, create_access_token, jwt_required, 
     get_jwt_identity, get_jwt
 )
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, ServerSelectionTimeoutError
 from bson import ObjectId
 from dotenv import load_dotenv
 
 from utils import (
-    hash_password, verify_password,
+    hash_password, verify_password, password_needs_rehash,
     # send_booking_confirmation_email, send_booking_cancellation_email,
     # send_booking_status_update_email,  # Email functionality commented out - will be added later
     calculate_discounted_price, is_discount_active,
-    is_future_datetime, format_date, format_time,
-    serialize_doc, serialize_docs,
-    validate_email, validate_required_fields,
+    is_future_datetime, format_date, format_time, today_str, to_json_bytes,
+    validate, make_required_validator,
     validate_time_slot, validate_date_format
 )
 
@@ -37,7 +44,24 @@ load_dotenv()
 
 # ==================== APP CONFIGURATION ====================
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson (much faster than stdlib json for large list responses).
+    Raw Mongo documents are encoded directly (see utils.to_json_bytes), so handlers don't need serialize_doc."""
+
+    def dumps(self, obj, **kwargs):
+        return to_json_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(to_json_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # CORS configuration - Allow all origins and ports (no CORS errors)
 # This allows requests from any origin, any port (localhost, production, etc.)
@@ -48,7 +72,7 @@ CORS(
     methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
     supports_credentials=False,  # Must be False when using wildcard * (browser security rule)
     expose_headers=['Content-Type', 'Authorization'],
-    max_age=600
+    max_age=86400
 )
 
 # Flask configuration
@@ -58,9 +82,22 @@ app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(
     seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 86400))
 )
 
+# Cache successful/failed bcrypt checks briefly so repeated logins skip the KDF.
+# Disable with USE_VERIFY_PASSWORD_CACHE=false in security-sensitive deployments.
+app.config['USE_VERIFY_PASSWORD_CACHE'] = os.getenv('USE_VERIFY_PASSWORD_CACHE', 'true').lower() == 'true'
+
 # Initialize JWT
 jwt = JWTManager(app)
 
+# Response cache for dashboard aggregations (SimpleCache is per-process, so a booking write only
+# invalidates the worker that handled it; set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share
+# the cache, and its invalidation, between workers)
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
+app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60))
+if os.getenv('CACHE_REDIS_URL'):
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+cache = Cache(app)
+
 # ==================== DATABASE CONNECTION ====================
 
 mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/salon_db')
@@ -90,10 +127,16 @@ if 'mongodb+srv://' in mongo_uri:
 try:
     client = MongoClient(
         mongo_uri,
-        serverSelectionTimeoutMS=5000,  # 5 second timeout
+        serverSelectionTimeoutMS=int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
         connectTimeoutMS=10000,  # 10 second connection timeout
         socketTimeoutMS=20000,  # 20 second socket timeout
-        retryWrites=True
+        retryWrites=True,
+        maxPoolSize=int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+        minPoolSize=int(os.getenv('MONGO_MIN_POOL_SIZE', 5)),  # keep warm connections (skip TLS handshakes)
+        # fail fast instead of parking request threads when the pool is exhausted
+        waitQueueTimeoutMS=int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000)),
+        compressors='zstd,zlib',  # wire compression; zstd needs the zstandard package
+        appname='salon-backend'
     )
 except Exception as e:
     print(f"✗ Error creating MongoDB client: {e}")
@@ -139,38 +182,176 @@ bookings_collection = db['bookings']
 staff_collection = db['staff']
 attendance_collection = db['attendance']
 
-# Create indexes
-users_collection.create_index('email', unique=True, sparse=True)
-users_collection.create_index('username', unique=True, sparse=True)
-bookings_collection.create_index([('service_id', 1), ('date', 1), ('time_slot', 1)], unique=True)
-# One attendance record per staff per day (prevents multiple check-ins same day)
-attendance_collection.create_index([('staff_id', 1), ('date', 1)], unique=True)
-# Services: no duplicate titles (case-insensitive). Skip if DB already has duplicates.
-try:
-    services_collection.create_index(
-        [('title', 1)],
-        unique=True,
-        collation={'locale': 'en', 'strength': 2}
-    )
-except Exception:
-    pass
-# Staff: no duplicate phone or email. Skip if DB already has duplicates.
-try:
-    staff_collection.create_index([('phone', 1)], unique=True)
-except Exception:
-    pass
-try:
-    staff_collection.create_index(
-        [('email', 1)],
-        unique=True,
-        partialFilterExpression={'email': {'$exists': True, '$ne': ''}}
-    )
-except Exception:
-    pass
+# Allowed values for validated request fields (tuples, so an unhashable JSON value such as a
+# list or object fails the membership check with a 400 instead of raising TypeError)
+VALID_BOOKING_STATUSES = ('Pending', 'Confirmed', 'Completed', 'Cancelled')
+VALID_DISCOUNT_TYPES = ('percentage', 'flat')
+VALID_STAFF_ROLES = ('stylist', 'receptionist', 'manager', 'therapist')
+VALID_STAFF_STATUSES = ('Active', 'Inactive')
+VALID_ATTENDANCE_STATUSES = ('Present', 'Absent', 'Half-day')
+
+# Fields an admin may change through the update endpoints
+SERVICE_UPDATE_FIELDS = ('title', 'description', 'base_price', 'discounted_price', 'duration', 'status')
+STAFF_UPDATE_FIELDS = ('full_name', 'email', 'phone', 'role', 'working_days', 'shift_timings', 'status')
+
+# Required-field checks for each fixed request body, built once at import
+validate_admin_login_fields = make_required_validator(('username', 'password'))
+validate_register_fields = make_required_validator(('name', 'email', 'password'))
+validate_customer_login_fields = make_required_validator(('email', 'password'))
+validate_service_fields = make_required_validator(('title', 'description', 'base_price', 'duration'))
+validate_discount_fields = make_required_validator(
+    ('service_id', 'discount_type', 'discount_value', 'start_date', 'end_date')
+)
+validate_staff_fields = make_required_validator(('full_name', 'phone', 'role'))
+validate_attendance_fields = make_required_validator(('staff_id', 'date'))
+validate_booking_fields = make_required_validator(('service_id', 'date', 'time_slot'))
+validate_bulk_status_fields = make_required_validator(('ids', 'status'))
+
+BOOKING_SLOT_INDEX_KEYS = [('service_id', 1), ('date', 1), ('time_slot', 1)]
+BOOKING_SLOT_INDEX_FILTER = {'status': {'$in': ['Pending', 'Confirmed', 'Completed']}}
+
+# Index definitions: (collection, keys, options, best_effort)
+# best_effort indexes are skipped, with a warning, if existing data violates them (e.g. duplicates)
+# or the server cannot build them
+INDEX_SPECS = [
+    (users_collection, [('email', 1)], {'unique': True, 'sparse': True}, False),
+    (users_collection, [('username', 1)], {'unique': True, 'sparse': True}, False),
+    # Role lookups (init_admin, dashboard customer count) and role-scoped login queries
+    (users_collection, [('role', 1)], {}, False),
+    (users_collection, [('username', 1), ('role', 1)], {}, False),
+    (users_collection, [('email', 1), ('role', 1)], {}, False),
+    # One live booking per service slot; cancelled bookings free the slot. $in in a partial filter
+    # needs MongoDB 6.0+; on older servers create_booking falls back to a find-before-insert check
+    (bookings_collection, BOOKING_SLOT_INDEX_KEYS, {
+        'unique': True,
+        'partialFilterExpression': BOOKING_SLOT_INDEX_FILTER
+    }, True),
+    # Active-booking checks per service (delete_service)
+    (bookings_collection, [('service_id', 1), ('status', 1)], {}, False),
+    # Booking listings: my-bookings (customer, newest date first), status/date filters, admin sort
+    (bookings_collection, [('customer_id', 1), ('date', -1)], {}, False),
+    (bookings_collection, [('status', 1), ('date', 1)], {}, False),
+    # Date-range aggregations (bookings-by-date) and day filters
+    (bookings_collection, [('date', 1), ('status', 1)], {}, False),
+    (bookings_collection, [('created_at', -1)], {}, False),
+    # Service listing status filter + created_at sort, active counts
+    (services_collection, [('status', 1), ('created_at', -1)], {}, False),
+    # Staff listing / active staff counts
+    (staff_collection, [('status', 1), ('is_deleted', 1)], {}, False),
+    # Latest updated_at lookups for the service listing ETag (get_services_listing_version)
+    (services_collection, [('updated_at', -1)], {}, False),
+    (discounts_collection, [('updated_at', -1)], {}, False),
+    # Active-discount lookups filter on service_id, is_active and the date window
+    (discounts_collection, [('service_id', 1), ('is_active', 1), ('start_date', 1), ('end_date', 1)], {}, False),
+    # One attendance record per staff per day (prevents multiple check-ins same day)
+    (attendance_collection, [('staff_id', 1), ('date', 1)], {'unique': True}, False),
+    # Services: no duplicate titles (case-insensitive). Skip if DB already has duplicates.
+    (services_collection, [('title', 1)], {'unique': True, 'collation': {'locale': 'en', 'strength': 2}}, True),
+    # Staff: no duplicate phone or email. Skip if DB already has duplicates.
+    (staff_collection, [('phone', 1)], {'unique': True}, True),
+    (staff_collection, [('email', 1)], {
+        'unique': True,
+        'partialFilterExpression': {'email': {'$exists': True, '$ne': ''}}
+    }, True),
+]
+
+
+def ensure_indexes(rebuild_changed: bool = False):
+    """
+    Create any indexes from INDEX_SPECS that do not exist yet.
+    Reads existing indexes once per collection, so booting a worker against an
+    already-initialized database costs one list_indexes call per collection
+    instead of a create_index round-trip per index.
+    Indexes whose definition changed are only rebuilt when rebuild_changed is set
+    (the one-shot `flask --app app rebuild-indexes` command), never at worker boot.
+    """
+    existing = {}
+    for collection, keys, options, best_effort in INDEX_SPECS:
+        if collection.name not in existing:
+            existing[collection.name] = {
+                tuple(index['key'].items()): index for index in collection.list_indexes()
+            }
+        current = existing[collection.name].get(tuple(keys))
+        if current is not None:
+            if (bool(current.get('unique')) == bool(options.get('unique'))
+                    and current.get('partialFilterExpression') == options.get('partialFilterExpression')):
+                continue
+            if not rebuild_changed:
+                print(f"⚠ Index {collection.name}.{current['name']} differs from its definition; "
+                      "run `flask --app app rebuild-indexes` to rebuild it")
+                continue
+            try:
+                rebuild_index(collection, current, keys, options)
+            except Exception as e:
+                if not best_effort:
+                    raise
+                print(f"⚠ Skipped rebuilding index {collection.name}.{current['name']}: {e}")
+            continue
+        try:
+            collection.create_index(keys, **options)
+        except Exception as e:
+            if not best_effort:
+                raise
+            print(f"⚠ Skipped index {collection.name} {keys}: {e}")
+
+
+def rebuild_index(collection, current: dict, keys: list, options: dict):
+    """
+    Replace an existing index with a new definition for the same keys.
+    The new index is built first under its own name and the old one dropped only after,
+    so a failed build (e.g. $in partial filters need MongoDB 6.0+) leaves the old index,
+    and its uniqueness guarantee, in place.
+    """
+    suffix = '_partial' if options.get('partialFilterExpression') else '_full'
+    name = '_'.join(f'{field}_{direction}' for field, direction in keys) + suffix
+    if name == current['name']:
+        name += '_rebuilt'
+    collection.create_index(keys, name=name, **options)
+    try:
+        collection.drop_index(current['name'])
+    except OperationFailure as e:
+        if e.code != 27:  # IndexNotFound: already dropped by a concurrent run
+            raise
+    print(f"✓ Rebuilt index {collection.name}.{current['name']} as {name}")
+
+
+_booking_slot_index_active = None
+
+
+def booking_slot_index_active() -> bool:
+    """
+    Whether the unique partial booking-slot index exists, checked once per process.
+    Without it (MongoDB < 6.0, or not built yet) create_booking checks for a live booking itself.
+    """
+    global _booking_slot_index_active
+    if _booking_slot_index_active is None:
+        _booking_slot_index_active = any(
+            index.get('unique') and index.get('partialFilterExpression') == BOOKING_SLOT_INDEX_FILTER
+            and list(index['key'].items()) == BOOKING_SLOT_INDEX_KEYS
+            for index in bookings_collection.list_indexes()
+        )
+        if not _booking_slot_index_active:
+            print("⚠ Unique booking-slot index missing (needs MongoDB 6.0+); "
+                  "checking for duplicate bookings before insert instead")
+    return _booking_slot_index_active
 
 
+@app.cli.command('rebuild-indexes')
+def rebuild_indexes_command():
+    """Create missing indexes and rebuild any whose definition changed (run once per deploy)"""
+    ensure_indexes(rebuild_changed=True)
+
+
+# Set ENSURE_INDEXES=false to skip this at boot (e.g. when a deploy step runs ensure_indexes() once)
+if os.getenv('ENSURE_INDEXES', 'true').lower() == 'true':
+    ensure_indexes()
+
 # ==================== HELPER FUNCTIONS ====================
 
+# Note: jwt_required() decodes and verifies the token once per request and keeps the
+# payload on the request context; get_jwt()/get_jwt_identity() read from there and
+# never re-decode, so the role checks below add no extra verification cost.
+
 def admin_required(fn):
     """Decorator to check if user is admin"""
     @wraps(fn)
@@ -195,27 +376,85 @@ def customer_required(fn):
     return wrapper
 
 
+# (service_id, today) -> active discount or None; admin edits invalidate entries
+_CACHE_MISS = object()
+_discount_ttl_cache = TTLCache(maxsize=2000, ttl=30)
+_discount_ttl_lock = threading.Lock()  # TTLCache is not thread-safe; request threads share it
+
+
 def get_active_discount(service_id: str) -> dict:
-    """Get active discount for a service"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    discount = discounts_collection.find_one({
-        'service_id': service_id,
-        'is_active': True,
-        'start_date': {'$lte': today},
-        'end_date': {'$gte': today}
-    })
+    """Get active discount for a service (memoized for the current request and cached for 30s)"""
+    cache = g.setdefault('_discount_cache', {})
+    if service_id in cache:
+        return cache[service_id]
+    
+    today = today_str()
+    key = (service_id, today)
+    with _discount_ttl_lock:
+        discount = _discount_ttl_cache.get(key, _CACHE_MISS)
+    if discount is _CACHE_MISS:
+        discount = discounts_collection.find_one({
+            'service_id': service_id,
+            'is_active': True,
+            'start_date': {'$lte': today},
+            'end_date': {'$gte': today}
+        }, {'discount_type': 1, 'discount_value': 1})
+        with _discount_ttl_lock:
+            _discount_ttl_cache[key] = discount
+    cache[service_id] = discount
     return discount
 
 
+def invalidate_discount_cache(service_id: str):
+    """Drop cached active-discount lookups for a service after discounts change"""
+    today = today_str()
+    with _discount_ttl_lock:
+        _discount_ttl_cache.pop((service_id, today), None)
+    g.pop('_discount_cache', None)
+    invalidate_services_listing_version()
+
+
+# Latest service/discount updated_at pair behind the service listing ETag. Writes in this
+# process drop it right away; other workers pick the change up once the entry expires.
+_listing_version_cache = TTLCache(maxsize=1, ttl=10)
+_listing_version_lock = threading.Lock()  # TTLCache is not thread-safe; request threads share it
+
+
+def get_services_listing_version() -> tuple:
+    """Latest service and discount updated_at values (cached for 10s)"""
+    with _listing_version_lock:
+        version = _listing_version_cache.get('version')
+    if version is None:
+        last_service = services_collection.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        last_discount = discounts_collection.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        version = (
+            last_service and last_service.get('updated_at'),
+            last_discount and last_discount.get('updated_at')
+        )
+        with _listing_version_lock:
+            _listing_version_cache['version'] = version
+    return version
+
+
+def invalidate_services_listing_version():
+    """Drop the cached listing version after a service or discount write"""
+    with _listing_version_lock:
+        _listing_version_cache.pop('version', None)
+
+
+def parse_object_id(value):
+    """Return the ObjectId for a valid id string, or None if it is malformed"""
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
 def service_title_exists(title: str, exclude_service_id: str = None) -> bool:
     """Check if a service with the same title already exists (case-insensitive). Optionally exclude a service ID (for updates)."""
     query = {'title': {'$regex': f'^{re.escape(title)}$', '$options': 'i'}}
     if exclude_service_id:
-        try:
-            query['_id'] = {'$ne': ObjectId(exclude_service_id)}
-        except Exception:
-            pass
-    return services_collection.find_one(query) is not None
+        exclude_oid = parse_object_id(exclude_service_id)
+        if exclude_oid is not None:
+            query['_id'] = {'$ne': exclude_oid}
+    return services_collection.find_one(query, {'_id': 1}) is not None
 
 
 def staff_phone_exists(phone: str, exclude_staff_id: str = None) -> bool:
@@ -225,11 +464,12 @@ def staff_phone_exists(phone: str, exclude_staff_id: str = None) -> bool:
         return False
     query = {'phone': phone_clean}
     if exclude_staff_id:
-        try:
-            query['_id'] = {'$ne': ObjectId(exclude_staff_id)}
-        except Exception:
-            pass
-    return staff_collection.find_one(query) is not None
+        exclude_oid = parse_object_id(exclude_staff_id)
+        if exclude_oid is not None:
+            query['_id'] = {'$ne': exclude_oid}
+        return staff_collection.find_one(query, {'_id': 1}) is not None
+    # Covered by the unique phone index when no _id filter is involved
+    return staff_collection.find_one(query, {'_id': 0, 'phone': 1}) is not None
 
 
 def staff_email_exists(email: str, exclude_staff_id: str = None) -> bool:
@@ -239,11 +479,10 @@ def staff_email_exists(email: str, exclude_staff_id: str = None) -> bool:
         return False
     query = {'email': {'$regex': f'^{re.escape(email_clean)}$', '$options': 'i'}}
     if exclude_staff_id:
-        try:
-            query['_id'] = {'$ne': ObjectId(exclude_staff_id)}
-        except Exception:
-            pass
-    return staff_collection.find_one(query) is not None
+        exclude_oid = parse_object_id(exclude_staff_id)
+        if exclude_oid is not None:
+            query['_id'] = {'$ne': exclude_oid}
+    return staff_collection.find_one(query, {'_id': 1}) is not None
 
 
 def parse_pagination(max_per_page=100, default_per_page=20):
@@ -260,6 +499,13 @@ def parse_pagination(max_per_page=100, default_per_page=20):
     return skip, per_page, page, per_page
 
 
+def count_matching(collection, query: dict) -> int:
+    """Count documents for a listing. Unfiltered listings use collection metadata instead of a scan."""
+    if not query:
+        return collection.estimated_document_count()
+    return collection.count_documents(query)
+
+
 def paginated_response(items_key: str, items: list, total: int, page: int, per_page: int):
     """Build JSON response with pagination metadata."""
     total_pages = math.ceil(total / per_page) if per_page > 0 else 0
@@ -289,13 +535,146 @@ def calculate_booking_price(service: dict) -> tuple:
     return (base_price, False)
 
 
+# (user_id, stored hash, sha256 of submitted password) -> bool
+_verify_password_cache = TTLCache(maxsize=2000, ttl=60)
+_verify_password_lock = threading.Lock()  # TTLCache is not thread-safe; request threads share it
+
+
+def check_user_password(user: dict, password: str) -> bool:
+    """Verify a login password for a user, using the short-lived verify cache when enabled.
+    The stored hash is part of the key so a password change invalidates old entries.
+    Legacy (non pre-hashed) hashes are replaced after a successful check."""
+    if not app.config['USE_VERIFY_PASSWORD_CACHE']:
+        result = verify_password(password, user['password'])
+    else:
+        key = (
+            str(user['_id']),
+            user['password'],
+            hashlib.sha256(password.encode('utf-8')).hexdigest()
+        )
+        with _verify_password_lock:
+            result = _verify_password_cache.get(key)
+        if result is None:
+            result = verify_password(password, user['password'])
+            with _verify_password_lock:
+                _verify_password_cache[key] = result
+    
+    if result and password_needs_rehash(user['password']):
+        # Lazy upgrade of legacy hashes; the filter skips it if the password changed meanwhile
+        users_collection.update_one(
+            {'_id': user['_id'], 'password': user['password']},
+            {'$set': {'password': hash_password(password)}}
+        )
+    return result
+
+
+# (identity, claims) -> recently issued access token
+_issued_token_cache = TTLCache(maxsize=1000, ttl=10)
+_issued_token_lock = threading.Lock()  # TTLCache is not thread-safe; request threads share it
+
+
+def issue_access_token(identity: str, claims: dict) -> str:
+    """Create an access token, reusing one issued for the same identity and claims in the last 10s
+    (clients that re-login in quick succession get the same still-valid token)"""
+    key = (identity, tuple(sorted(claims.items())))
+    with _issued_token_lock:
+        token = _issued_token_cache.get(key)
+    if token is None:
+        token = create_access_token(identity=identity, additional_claims=claims)
+        with _issued_token_lock:
+            _issued_token_cache[key] = token
+    return token
+
+
+# user_id -> profile fields returned by /api/auth/me
+_current_user_cache = TTLCache(maxsize=5000, ttl=30)
+_current_user_lock = threading.Lock()  # TTLCache is not thread-safe; request threads share it
+
+
+def service_title_lookup_stages() -> list:
+    """Aggregation stages joining the current service title onto a $group keyed by service_id"""
+    # service_id is stored on bookings as a string, so convert it before joining on services._id;
+    # the title copied onto the booking is kept as a fallback for services that no longer exist
+    return [
+        {'$addFields': {'service_oid': {'$convert': {
+            'input': '$_id', 'to': 'objectId', 'onError': None, 'onNull': None
+        }}}},
+        {'$lookup': {
+            'from': services_collection.name,
+            'localField': 'service_oid',
+            'foreignField': '_id',
+            'as': 'svc'
+        }},
+        {'$addFields': {'service_title': {
+            '$ifNull': [{'$arrayElemAt': ['$svc.title', 0]}, '$service_title']
+        }}},
+        {'$project': {'svc': 0, 'service_oid': 0}}
+    ]
+
+
+def count_if(condition: dict) -> dict:
+    """$group accumulator counting documents that match an aggregation expression"""
+    return {'$sum': {'$cond': [condition, 1, 0]}}
+
+
+def get_booking_dashboard_counts(today: str, month_start: str = None) -> dict:
+    """
+    Booking counts (and completed revenue) for the dashboards in one pass over bookings,
+    instead of a count_documents round-trip per figure.
+    """
+    group = {
+        '_id': None,
+        'total': {'$sum': 1},
+        'today': count_if({'$eq': ['$date', today]}),
+        'pending': count_if({'$eq': ['$status', 'Pending']}),
+        'confirmed': count_if({'$eq': ['$status', 'Confirmed']}),
+        'completed': count_if({'$eq': ['$status', 'Completed']}),
+        'cancelled': count_if({'$eq': ['$status', 'Cancelled']}),
+        'revenue_total': {'$sum': {'$cond': [{'$eq': ['$status', 'Completed']}, '$final_price', 0]}}
+    }
+    if month_start:
+        group['revenue_this_month'] = {'$sum': {'$cond': [
+            {'$and': [{'$eq': ['$status', 'Completed']}, {'$gte': ['$date', month_start]}]},
+            '$final_price',
+            0
+        ]}}
+    
+    result = list(bookings_collection.aggregate([{'$group': group}]))
+    counts = result[0] if result else {}
+    return {key: counts.get(key, 0) for key in group if key != '_id'}
+
+
+# Shared by dashboard endpoints that fan out independent queries; pymongo releases the GIL during IO
+_dashboard_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard')
+
+
+# Dashboard cache keys embed a random generation token; dropping the token orphans every cached
+# dashboard response at once (they expire on their own) without clearing or scanning the cache
+DASHBOARD_CACHE_GENERATION_KEY = 'dashboard:generation'
+
+
+def dashboard_cache_key_prefix() -> str:
+    """Cache key prefix for dashboard views: current generation token plus the request path"""
+    generation = cache.get(DASHBOARD_CACHE_GENERATION_KEY)
+    if generation is None:
+        # add() only succeeds for the first worker; everyone else re-reads its token
+        cache.add(DASHBOARD_CACHE_GENERATION_KEY, secrets.token_hex(8), timeout=0)
+        generation = cache.get(DASHBOARD_CACHE_GENERATION_KEY)
+    return f'dashboard:{generation}:{request.path}:'
+
+
+def invalidate_dashboard_cache():
+    """Drop cached dashboard responses after a booking write"""
+    cache.delete(DASHBOARD_CACHE_GENERATION_KEY)
+
+
 def init_admin():
     """Initialize default admin user if not exists"""
     admin_username = os.getenv('ADMIN_USERNAME', 'admin')
     admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')
     admin_email = os.getenv('ADMIN_EMAIL', 'admin@salonshop.com')
     
-    existing_admin = users_collection.find_one({'role': 'admin'})
+    existing_admin = users_collection.find_one({'role': 'admin'}, {'_id': 1})
     if not existing_admin:
         admin_user = {
             'username': admin_username,
@@ -315,21 +694,22 @@ def admin_login():
     """Admin login endpoint"""
     data = request.get_json()
     
-    is_valid, missing = validate_required_fields(data, ['username', 'password'])
+    is_valid, missing = validate_admin_login_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
+    # Only the fields needed for the password check and the response
     admin = users_collection.find_one({
         'username': data['username'],
         'role': 'admin'
-    })
+    }, {'username': 1, 'email': 1, 'password': 1})
     
-    if not admin or not verify_password(data['password'], admin['password']):
+    if not admin or not check_user_password(admin, data['password']):
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    access_token = create_access_token(
-        identity=str(admin['_id']),
-        additional_claims={'role': 'admin', 'username': admin['username']}
+    access_token = issue_access_token(
+        str(admin['_id']),
+        {'role': 'admin', 'username': admin['username']}
     )
     
     return jsonify({
@@ -349,18 +729,19 @@ def customer_register():
     """Customer registration endpoint"""
     data = request.get_json()
     
-    is_valid, missing = validate_required_fields(data, ['name', 'email', 'password'])
+    is_valid, missing = validate_register_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
-    if not validate_email(data['email']):
-        return jsonify({'error': 'Invalid email format'}), 400
+    is_valid, error = validate('email', data['email'])
+    if not is_valid:
+        return jsonify({'error': error}), 400
     
     if len(data['password']) < 6:
         return jsonify({'error': 'Password must be at least 6 characters'}), 400
     
     # Check if email already exists
-    existing_user = users_collection.find_one({'email': data['email']})
+    existing_user = users_collection.find_one({'email': data['email']}, {'_id': 1})
     if existing_user:
         return jsonify({'error': 'Email already registered'}), 409
     
@@ -376,9 +757,9 @@ def customer_register():
     try:
         result = users_collection.insert_one(customer)
         
-        access_token = create_access_token(
-            identity=str(result.inserted_id),
-            additional_claims={'role': 'customer', 'email': customer['email']}
+        access_token = issue_access_token(
+            str(result.inserted_id),
+            {'role': 'customer', 'email': customer['email'], 'name': customer['name']}
         )
         
         return jsonify({
@@ -401,21 +782,22 @@ def customer_login():
     """Customer login endpoint"""
     data = request.get_json()
     
-    is_valid, missing = validate_required_fields(data, ['email', 'password'])
+    is_valid, missing = validate_customer_login_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
+    # Only the fields needed for the password check and the response
     customer = users_collection.find_one({
         'email': data['email'].lower(),
         'role': 'customer'
-    })
+    }, {'name': 1, 'email': 1, 'password': 1})
     
-    if not customer or not verify_password(data['password'], customer['password']):
+    if not customer or not check_user_password(customer, data['password']):
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    access_token = create_access_token(
-        identity=str(customer['_id']),
-        additional_claims={'role': 'customer', 'email': customer['email']}
+    access_token = issue_access_token(
+        str(customer['_id']),
+        {'role': 'customer', 'email': customer['email'], 'name': customer['name']}
     )
     
     return jsonify({
@@ -437,7 +819,16 @@ def get_current_user():
     user_id = get_jwt_identity()
     claims = get_jwt()
     
-    user = users_collection.find_one({'_id': ObjectId(user_id)})
+    with _current_user_lock:
+        user = _current_user_cache.get(user_id)
+    if user is None:
+        user = users_collection.find_one(
+            {'_id': ObjectId(user_id)},
+            {'email': 1, 'username': 1, 'name': 1, 'phone': 1}
+        )
+        if user:
+            with _current_user_lock:
+                _current_user_cache[user_id] = user
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -464,8 +855,7 @@ def create_service():
     """Create a new service (Admin only)"""
     data = request.get_json()
     
-    required_fields = ['title', 'description', 'base_price', 'duration']
-    is_valid, missing = validate_required_fields(data, required_fields)
+    is_valid, missing = validate_service_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
@@ -479,6 +869,7 @@ def create_service():
         return jsonify({'error': 'A service with this title already exists'}), 409
     
     title = data['title'].strip()
+    now = datetime.utcnow()
     service = {
         'title': title,
         'description': data['description'],
@@ -486,16 +877,17 @@ def create_service():
         'discounted_price': data.get('discounted_price'),
         'duration': int(data['duration']),
         'status': data.get('status', 'Active'),
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
+        'created_at': now,
+        'updated_at': now
     }
     
     result = services_collection.insert_one(service)
     service['_id'] = result.inserted_id
+    invalidate_services_listing_version()
     
     return jsonify({
         'message': 'Service created successfully',
-        'service': serialize_doc(service)
+        'service': service
     }), 201
 
 
@@ -515,13 +907,54 @@ def get_all_services():
             {'description': {'$regex': search, '$options': 'i'}}
         ]
     
-    total = services_collection.count_documents(query)
-    cursor = services_collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
-    services = list(cursor)
+    total = count_matching(services_collection, query)
+    today = today_str()
+    
+    # Conditional GET: the listing only changes when a service or discount is written,
+    # a service is removed (total changes) or the day rolls over (discount windows)
+    last_service_update, last_discount_update = get_services_listing_version()
+    etag = hashlib.md5(
+        '|'.join([
+            str(last_service_update),
+            str(last_discount_update),
+            str(total),
+            today,
+            request.query_string.decode('utf-8', 'replace')
+        ]).encode('utf-8')
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        not_modified = app.response_class(status=304)
+        not_modified.set_etag(etag)
+        return not_modified
+    
+    # Join each service on the page with its active discount in a single round-trip
+    pipeline = [
+        {'$match': query},
+        {'$sort': {'created_at': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {
+            'from': discounts_collection.name,
+            'let': {'sid': {'$toString': '$_id'}},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$service_id', '$$sid']},
+                    {'$eq': ['$is_active', True]},
+                    {'$lte': ['$start_date', today]},
+                    {'$gte': ['$end_date', today]}
+                ]}}},
+                {'$limit': 1},
+                {'$project': {'_id': 0, 'discount_type': 1, 'discount_value': 1}}
+            ],
+            'as': 'active_discount'
+        }}
+    ]
+    services = list(services_collection.aggregate(pipeline))
     
     # Add discount information to each service
     for service in services:
-        discount = get_active_discount(str(service['_id']))
+        matches = service.pop('active_discount', [])
+        discount = matches[0] if matches else None
         if discount:
             service['has_discount'] = True
             service['discount_type'] = discount['discount_type']
@@ -535,17 +968,19 @@ def get_all_services():
             service['has_discount'] = False
             service['final_price'] = service['base_price']
     
-    return jsonify(paginated_response('services', serialize_docs(services), total, page, per_page)), 200
+    response = jsonify(paginated_response('services', services, total, page, per_page))
+    response.set_etag(etag)
+    return response, 200
 
 
 @app.route('/api/services/<service_id>', methods=['GET'])
 def get_service(service_id):
     """Get a single service by ID (Public)"""
-    try:
-        service = services_collection.find_one({'_id': ObjectId(service_id)})
-    except:
+    service_oid = parse_object_id(service_id)
+    if service_oid is None:
         return jsonify({'error': 'Invalid service ID'}), 400
     
+    service = services_collection.find_one({'_id': service_oid})
     if not service:
         return jsonify({'error': 'Service not found'}), 404
     
@@ -564,7 +999,7 @@ def get_service(service_id):
         service['has_discount'] = False
         service['final_price'] = service['base_price']
     
-    return jsonify({'service': serialize_doc(service)}), 200
+    return jsonify({'service': service}), 200
 
 
 @app.route('/api/services/<service_id>', methods=['PUT'])
@@ -573,18 +1008,13 @@ def update_service(service_id):
     """Update a service (Admin only)"""
     data = request.get_json()
     
-    try:
-        service = services_collection.find_one({'_id': ObjectId(service_id)})
-    except:
+    service_oid = parse_object_id(service_id)
+    if service_oid is None:
         return jsonify({'error': 'Invalid service ID'}), 400
     
-    if not service:
-        return jsonify({'error': 'Service not found'}), 404
-    
     update_data = {'updated_at': datetime.utcnow()}
     
-    allowed_fields = ['title', 'description', 'base_price', 'discounted_price', 'duration', 'status']
-    for field in allowed_fields:
+    for field in SERVICE_UPDATE_FIELDS:
         if field in data:
             if field == 'base_price' and data[field] <= 0:
                 return jsonify({'error': 'Base price must be greater than 0'}), 400
@@ -598,16 +1028,19 @@ def update_service(service_id):
             else:
                 update_data[field] = data[field]
     
-    services_collection.update_one(
-        {'_id': ObjectId(service_id)},
-        {'$set': update_data}
+    # Existence is checked by the update itself (None means no such service)
+    updated_service = services_collection.find_one_and_update(
+        {'_id': service_oid},
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_service = services_collection.find_one({'_id': ObjectId(service_id)})
+    if not updated_service:
+        return jsonify({'error': 'Service not found'}), 404
+    invalidate_services_listing_version()
     
     return jsonify({
         'message': 'Service updated successfully',
-        'service': serialize_doc(updated_service)
+        'service': updated_service
     }), 200
 
 
@@ -615,36 +1048,40 @@ def update_service(service_id):
 @admin_required
 def delete_service(service_id):
     """Delete or deactivate a service (Admin only)"""
-    try:
-        service = services_collection.find_one({'_id': ObjectId(service_id)})
-    except:
+    service_oid = parse_object_id(service_id)
+    if service_oid is None:
         return jsonify({'error': 'Invalid service ID'}), 400
     
-    if not service:
-        return jsonify({'error': 'Service not found'}), 404
-    
-    # Check if service has any pending/confirmed bookings
-    active_bookings = bookings_collection.count_documents({
+    # Check if service has any pending/confirmed bookings (existence only, no full count).
+    # Projecting only index keys lets the (service_id, status) index cover the query.
+    active_booking = bookings_collection.find_one({
         'service_id': service_id,
         'status': {'$in': ['Pending', 'Confirmed']}
-    })
+    }, {'_id': 0, 'service_id': 1})
     
-    if active_bookings > 0:
+    if active_booking:
         # Deactivate instead of delete
-        services_collection.update_one(
-            {'_id': ObjectId(service_id)},
-            {'$set': {'status': 'Inactive', 'updated_at': datetime.utcnow()}}
+        service = services_collection.find_one_and_update(
+            {'_id': service_oid},
+            {'$set': {'status': 'Inactive', 'updated_at': datetime.utcnow()}},
+            projection={'_id': 1}
         )
+        if not service:
+            return jsonify({'error': 'Service not found'}), 404
+        invalidate_services_listing_version()
         return jsonify({
             'message': 'Service deactivated (has active bookings)',
             'deactivated': True
         }), 200
     
     # Delete the service
-    services_collection.delete_one({'_id': ObjectId(service_id)})
+    service = services_collection.find_one_and_delete({'_id': service_oid}, projection={'_id': 1})
+    if not service:
+        return jsonify({'error': 'Service not found'}), 404
     
     # Also delete associated discounts
     discounts_collection.delete_many({'service_id': service_id})
+    invalidate_discount_cache(service_id)
     
     return jsonify({'message': 'Service deleted successfully'}), 200
 
@@ -657,22 +1094,21 @@ def create_discount():
     """Create a discount for a service (Admin only)"""
     data = request.get_json()
     
-    required_fields = ['service_id', 'discount_type', 'discount_value', 'start_date', 'end_date']
-    is_valid, missing = validate_required_fields(data, required_fields)
+    is_valid, missing = validate_discount_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
     # Validate service exists
-    try:
-        service = services_collection.find_one({'_id': ObjectId(data['service_id'])})
-    except:
+    service_oid = parse_object_id(data['service_id'])
+    if service_oid is None:
         return jsonify({'error': 'Invalid service ID'}), 400
     
+    service = services_collection.find_one({'_id': service_oid}, {'_id': 1})
     if not service:
         return jsonify({'error': 'Service not found'}), 404
     
     # Validate discount type
-    if data['discount_type'] not in ['percentage', 'flat']:
+    if data['discount_type'] not in VALID_DISCOUNT_TYPES:
         return jsonify({'error': 'Discount type must be "percentage" or "flat"'}), 400
     
     # Validate discount value
@@ -696,11 +1132,12 @@ def create_discount():
         '$or': [
             {'start_date': {'$lte': data['end_date']}, 'end_date': {'$gte': data['start_date']}}
         ]
-    })
+    }, {'_id': 1})
     
     if existing_discount:
         return jsonify({'error': 'An active discount already exists for this service in the specified date range'}), 409
     
+    now = datetime.utcnow()
     discount = {
         'service_id': data['service_id'],
         'discount_type': data['discount_type'],
@@ -708,16 +1145,17 @@ def create_discount():
         'start_date': data['start_date'],
         'end_date': data['end_date'],
         'is_active': True,
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
+        'created_at': now,
+        'updated_at': now
     }
     
     result = discounts_collection.insert_one(discount)
     discount['_id'] = result.inserted_id
+    invalidate_discount_cache(discount['service_id'])
     
     return jsonify({
         'message': 'Discount created successfully',
-        'discount': serialize_doc(discount)
+        'discount': discount
     }), 201
 
 
@@ -735,37 +1173,41 @@ def get_all_discounts():
     if is_active is not None:
         query['is_active'] = is_active.lower() == 'true'
     
-    total = discounts_collection.count_documents(query)
+    total = count_matching(discounts_collection, query)
     cursor = discounts_collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
     discounts = list(cursor)
     
-    # Add service information to each discount
+    # Add service information to each discount (one query for the whole page)
+    service_ids = list({ObjectId(d['service_id']) for d in discounts})
+    service_titles = {
+        str(s['_id']): s['title']
+        for s in services_collection.find({'_id': {'$in': service_ids}}, {'title': 1})
+    } if service_ids else {}
     for discount in discounts:
-        service = services_collection.find_one({'_id': ObjectId(discount['service_id'])})
-        if service:
-            discount['service_title'] = service['title']
+        if discount['service_id'] in service_titles:
+            discount['service_title'] = service_titles[discount['service_id']]
     
-    return jsonify(paginated_response('discounts', serialize_docs(discounts), total, page, per_page)), 200
+    return jsonify(paginated_response('discounts', discounts, total, page, per_page)), 200
 
 
 @app.route('/api/discounts/<discount_id>', methods=['GET'])
 @admin_required
 def get_discount(discount_id):
     """Get a single discount by ID (Admin only)"""
-    try:
-        discount = discounts_collection.find_one({'_id': ObjectId(discount_id)})
-    except:
+    discount_oid = parse_object_id(discount_id)
+    if discount_oid is None:
         return jsonify({'error': 'Invalid discount ID'}), 400
     
+    discount = discounts_collection.find_one({'_id': discount_oid})
     if not discount:
         return jsonify({'error': 'Discount not found'}), 404
     
     # Add service information
-    service = services_collection.find_one({'_id': ObjectId(discount['service_id'])})
+    service = services_collection.find_one({'_id': ObjectId(discount['service_id'])}, {'title': 1})
     if service:
         discount['service_title'] = service['title']
     
-    return jsonify({'discount': serialize_doc(discount)}), 200
+    return jsonify({'discount': discount}), 200
 
 
 @app.route('/api/discounts/<discount_id>', methods=['PUT'])
@@ -774,18 +1216,21 @@ def update_discount(discount_id):
     """Update a discount (Admin only)"""
     data = request.get_json()
     
-    try:
-        discount = discounts_collection.find_one({'_id': ObjectId(discount_id)})
-    except:
+    discount_oid = parse_object_id(discount_id)
+    if discount_oid is None:
         return jsonify({'error': 'Invalid discount ID'}), 400
     
+    discount = discounts_collection.find_one(
+        {'_id': discount_oid},
+        {'service_id': 1, 'discount_type': 1, 'start_date': 1, 'end_date': 1}
+    )
     if not discount:
         return jsonify({'error': 'Discount not found'}), 404
     
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'discount_type' in data:
-        if data['discount_type'] not in ['percentage', 'flat']:
+        if data['discount_type'] not in VALID_DISCOUNT_TYPES:
             return jsonify({'error': 'Discount type must be "percentage" or "flat"'}), 400
         update_data['discount_type'] = data['discount_type']
     
@@ -816,16 +1261,16 @@ def update_discount(discount_id):
     if start_date > end_date:
         return jsonify({'error': 'Start date must be before end date'}), 400
     
-    discounts_collection.update_one(
-        {'_id': ObjectId(discount_id)},
-        {'$set': update_data}
+    updated_discount = discounts_collection.find_one_and_update(
+        {'_id': discount_oid},
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_discount = discounts_collection.find_one({'_id': ObjectId(discount_id)})
+    invalidate_discount_cache(discount['service_id'])
     
     return jsonify({
         'message': 'Discount updated successfully',
-        'discount': serialize_doc(updated_discount)
+        'discount': updated_discount
     }), 200
 
 
@@ -833,20 +1278,21 @@ def update_discount(discount_id):
 @admin_required
 def delete_discount(discount_id):
     """Delete or disable a discount (Admin only)"""
-    try:
-        discount = discounts_collection.find_one({'_id': ObjectId(discount_id)})
-    except:
+    discount_oid = parse_object_id(discount_id)
+    if discount_oid is None:
         return jsonify({'error': 'Invalid discount ID'}), 400
     
-    if not discount:
-        return jsonify({'error': 'Discount not found'}), 404
-    
     # Disable the discount instead of deleting
-    discounts_collection.update_one(
-        {'_id': ObjectId(discount_id)},
-        {'$set': {'is_active': False, 'updated_at': datetime.utcnow()}}
+    discount = discounts_collection.find_one_and_update(
+        {'_id': discount_oid},
+        {'$set': {'is_active': False, 'updated_at': datetime.utcnow()}},
+        projection={'service_id': 1}
     )
     
+    if not discount:
+        return jsonify({'error': 'Discount not found'}), 404
+    invalidate_discount_cache(discount['service_id'])
+    
     return jsonify({'message': 'Discount disabled successfully'}), 200
 
 
@@ -858,12 +1304,11 @@ def create_staff():
     """Create a new staff member (Admin only)"""
     data = request.get_json()
     
-    required_fields = ['full_name', 'phone', 'role']
-    is_valid, missing = validate_required_fields(data, required_fields)
+    is_valid, missing = validate_staff_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
-    if data['role'] not in ['stylist', 'receptionist', 'manager', 'therapist']:
+    if data['role'] not in VALID_STAFF_ROLES:
         return jsonify({'error': 'Invalid role. Use: stylist, receptionist, manager, therapist'}), 400
     
     phone = (data['phone'] or '').strip()
@@ -875,6 +1320,7 @@ def create_staff():
     if email and staff_email_exists(email):
         return jsonify({'error': 'A staff member with this email already exists'}), 409
     
+    now = datetime.utcnow()
     staff = {
         'full_name': data['full_name'].strip(),
         'email': email,
@@ -884,11 +1330,11 @@ def create_staff():
         'shift_timings': data.get('shift_timings', {}),  # e.g. {"start": "09:00", "end": "17:00"}
         'status': data.get('status', 'Active'),
         'is_deleted': False,
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
+        'created_at': now,
+        'updated_at': now
     }
     
-    if staff['status'] not in ['Active', 'Inactive']:
+    if staff['status'] not in VALID_STAFF_STATUSES:
         return jsonify({'error': 'Status must be Active or Inactive'}), 400
     
     result = staff_collection.insert_one(staff)
@@ -897,7 +1343,7 @@ def create_staff():
     
     return jsonify({
         'message': 'Staff created successfully',
-        'staff': serialize_doc(staff)
+        'staff': staff
     }), 201
 
 
@@ -926,27 +1372,27 @@ def get_all_staff():
             {'phone': {'$regex': search, '$options': 'i'}}
         ]
     
-    total = staff_collection.count_documents(query)
+    total = count_matching(staff_collection, query)
     cursor = staff_collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
     staff_list = list(cursor)
     
     for s in staff_list:
         s['staff_id'] = str(s['_id'])
     
-    return jsonify(paginated_response('staff', serialize_docs(staff_list), total, page, per_page)), 200
+    return jsonify(paginated_response('staff', staff_list, total, page, per_page)), 200
 
 
 @app.route('/api/admin/staff/<staff_id>', methods=['GET'])
 @admin_required
 def get_staff(staff_id):
     """Get a single staff member by ID (Admin only)"""
-    try:
-        staff = staff_collection.find_one({'_id': ObjectId(staff_id), 'is_deleted': False})
-    except:
+    staff_oid = parse_object_id(staff_id)
+    if staff_oid is None:
         return jsonify({'error': 'Invalid staff ID'}), 400
     
+    staff = staff_collection.find_one({'_id': staff_oid, 'is_deleted': False})
     if not staff:
-        staff = staff_collection.find_one({'_id': ObjectId(staff_id)})
+        staff = staff_collection.find_one({'_id': staff_oid})
         if not staff:
             return jsonify({'error': 'Staff not found'}), 404
         if staff.get('is_deleted'):
@@ -954,7 +1400,7 @@ def get_staff(staff_id):
     
     staff['staff_id'] = str(staff['_id'])
     
-    return jsonify({'staff': serialize_doc(staff)}), 200
+    return jsonify({'staff': staff}), 200
 
 
 @app.route('/api/admin/staff/<staff_id>', methods=['PUT'])
@@ -963,18 +1409,13 @@ def update_staff(staff_id):
     """Update a staff member (Admin only)"""
     data = request.get_json()
     
-    try:
-        staff = staff_collection.find_one({'_id': ObjectId(staff_id), 'is_deleted': False})
-    except:
+    staff_oid = parse_object_id(staff_id)
+    if staff_oid is None:
         return jsonify({'error': 'Invalid staff ID'}), 400
     
-    if not staff:
-        return jsonify({'error': 'Staff not found'}), 404
-    
     update_data = {'updated_at': datetime.utcnow()}
     
-    allowed_fields = ['full_name', 'email', 'phone', 'role', 'working_days', 'shift_timings', 'status']
-    for field in allowed_fields:
+    for field in STAFF_UPDATE_FIELDS:
         if field in data:
             if field == 'phone':
                 phone = (data['phone'] or '').strip()
@@ -991,22 +1432,24 @@ def update_staff(staff_id):
             else:
                 update_data[field] = data[field]
     
-    if 'role' in data and data['role'] not in ['stylist', 'receptionist', 'manager', 'therapist']:
+    if 'role' in data and data['role'] not in VALID_STAFF_ROLES:
         return jsonify({'error': 'Invalid role'}), 400
-    if 'status' in data and data['status'] not in ['Active', 'Inactive']:
+    if 'status' in data and data['status'] not in VALID_STAFF_STATUSES:
         return jsonify({'error': 'Status must be Active or Inactive'}), 400
     
-    staff_collection.update_one(
-        {'_id': ObjectId(staff_id)},
-        {'$set': update_data}
+    # Existence is checked by the update itself (None means missing or soft-deleted)
+    updated_staff = staff_collection.find_one_and_update(
+        {'_id': staff_oid, 'is_deleted': False},
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_staff = staff_collection.find_one({'_id': ObjectId(staff_id)})
+    if not updated_staff:
+        return jsonify({'error': 'Staff not found'}), 404
     updated_staff['staff_id'] = str(updated_staff['_id'])
     
     return jsonify({
         'message': 'Staff updated successfully',
-        'staff': serialize_doc(updated_staff)
+        'staff': updated_staff
     }), 200
 
 
@@ -1014,22 +1457,21 @@ def update_staff(staff_id):
 @admin_required
 def deactivate_staff(staff_id):
     """Soft delete / deactivate a staff member (Admin only)"""
-    try:
-        staff = staff_collection.find_one({'_id': ObjectId(staff_id)})
-    except:
+    staff_oid = parse_object_id(staff_id)
+    if staff_oid is None:
         return jsonify({'error': 'Invalid staff ID'}), 400
     
-    if not staff:
-        return jsonify({'error': 'Staff not found'}), 404
-    
-    if staff.get('is_deleted'):
-        return jsonify({'message': 'Staff is already deactivated'}), 200
-    
-    staff_collection.update_one(
-        {'_id': ObjectId(staff_id)},
+    result = staff_collection.update_one(
+        {'_id': staff_oid, 'is_deleted': {'$ne': True}},
         {'$set': {'is_deleted': True, 'status': 'Inactive', 'updated_at': datetime.utcnow()}}
     )
     
+    if result.matched_count == 0:
+        # Either the staff does not exist or is already soft-deleted
+        if not staff_collection.find_one({'_id': staff_oid}, {'_id': 1}):
+            return jsonify({'error': 'Staff not found'}), 404
+        return jsonify({'message': 'Staff is already deactivated'}), 200
+    
     return jsonify({'message': 'Staff deactivated successfully (soft delete)'}), 200
 
 
@@ -1041,34 +1483,30 @@ def attendance_checkin():
     """Mark check-in for a staff member (Admin only). One check-in per staff per day."""
     data = request.get_json()
     
-    is_valid, missing = validate_required_fields(data, ['staff_id', 'date'])
+    is_valid, missing = validate_attendance_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
-    if not validate_date_format(data['date']):
-        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    is_valid, error = validate('date', data['date'])
+    if not is_valid:
+        return jsonify({'error': error}), 400
     
-    try:
-        staff = staff_collection.find_one({'_id': ObjectId(data['staff_id']), 'is_deleted': False})
-    except:
+    staff_oid = parse_object_id(data['staff_id'])
+    if staff_oid is None:
         return jsonify({'error': 'Invalid staff ID'}), 400
     
+    staff = staff_collection.find_one(
+        {'_id': staff_oid, 'is_deleted': False},
+        {'full_name': 1}
+    )
     if not staff:
         return jsonify({'error': 'Staff not found or inactive'}), 404
     
-    # Prevent multiple check-ins for same staff on same day
-    existing = attendance_collection.find_one({
-        'staff_id': data['staff_id'],
-        'date': data['date']
-    })
-    
-    if existing:
-        return jsonify({'error': 'Check-in already recorded for this staff on this date'}), 409
-    
     check_in_time = data.get('check_in_time') or datetime.now().strftime("%H:%M")
     if not validate_time_slot(check_in_time):
         return jsonify({'error': 'Invalid check_in_time format. Use HH:MM'}), 400
     
+    now = datetime.utcnow()
     attendance = {
         'staff_id': data['staff_id'],
         'staff_name': staff['full_name'],
@@ -1076,16 +1514,20 @@ def attendance_checkin():
         'check_in_time': check_in_time,
         'check_out_time': None,
         'attendance_status': 'Present',
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
+        'created_at': now,
+        'updated_at': now
     }
     
-    result = attendance_collection.insert_one(attendance)
+    # The unique (staff_id, date) index rejects a second check-in for the same day
+    try:
+        result = attendance_collection.insert_one(attendance)
+    except DuplicateKeyError:
+        return jsonify({'error': 'Check-in already recorded for this staff on this date'}), 409
     attendance['_id'] = result.inserted_id
     
     return jsonify({
         'message': 'Check-in recorded successfully',
-        'attendance': serialize_doc(attendance)
+        'attendance': attendance
     }), 201
 
 
@@ -1095,43 +1537,42 @@ def attendance_checkout():
     """Mark check-out for a staff member (Admin only)"""
     data = request.get_json()
     
-    is_valid, missing = validate_required_fields(data, ['staff_id', 'date'])
+    is_valid, missing = validate_attendance_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
-    if not validate_date_format(data['date']):
-        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-    
-    attendance = attendance_collection.find_one({
-        'staff_id': data['staff_id'],
-        'date': data['date']
-    })
-    
-    if not attendance:
-        return jsonify({'error': 'No check-in record found for this staff on this date'}), 404
+    is_valid, error = validate('date', data['date'])
+    if not is_valid:
+        return jsonify({'error': error}), 400
     
     check_out_time = data.get('check_out_time') or datetime.now().strftime("%H:%M")
     if not validate_time_slot(check_out_time):
         return jsonify({'error': 'Invalid check_out_time format. Use HH:MM'}), 400
     
-    attendance_status = data.get('attendance_status', attendance.get('attendance_status', 'Present'))
-    if attendance_status not in ['Present', 'Absent', 'Half-day']:
-        return jsonify({'error': 'attendance_status must be Present, Absent, or Half-day'}), 400
+    if 'attendance_status' in data:
+        if data['attendance_status'] not in VALID_ATTENDANCE_STATUSES:
+            return jsonify({'error': 'attendance_status must be Present, Absent, or Half-day'}), 400
+        attendance_status = {'$literal': data['attendance_status']}
+    else:
+        # Keep the recorded status (pipeline update reads it server-side, no pre-fetch needed)
+        attendance_status = {'$ifNull': ['$attendance_status', 'Present']}
     
-    attendance_collection.update_one(
-        {'_id': attendance['_id']},
-        {'$set': {
-            'check_out_time': check_out_time,
+    updated = attendance_collection.find_one_and_update(
+        {'staff_id': data['staff_id'], 'date': data['date']},
+        [{'$set': {
+            'check_out_time': {'$literal': check_out_time},
             'attendance_status': attendance_status,
             'updated_at': datetime.utcnow()
-        }}
+        }}],
+        return_document=ReturnDocument.AFTER
     )
     
-    updated = attendance_collection.find_one({'_id': attendance['_id']})
+    if not updated:
+        return jsonify({'error': 'No check-in record found for this staff on this date'}), 404
     
     return jsonify({
         'message': 'Check-out recorded successfully',
-        'attendance': serialize_doc(updated)
+        'attendance': updated
     }), 200
 
 
@@ -1166,11 +1607,11 @@ def get_attendance_list():
     if attendance_status:
         query['attendance_status'] = attendance_status
     
-    total = attendance_collection.count_documents(query)
-    cursor = attendance_collection.find(query).sort('date', -1).skip(skip).limit(limit)
-    records = list(cursor)
+    total = count_matching(attendance_collection, query)
+    cursor = attendance_collection.find(query).sort('date', -1).skip(skip).limit(limit).batch_size(limit)
     
-    return jsonify(paginated_response('attendance', serialize_docs(records), total, page, per_page)), 200
+    # ObjectId/datetime values are encoded by the orjson provider; no serialize_docs pass needed
+    return jsonify(paginated_response('attendance', list(cursor), total, page, per_page)), 200
 
 
 @app.route('/api/admin/attendance/<attendance_id>', methods=['PUT'])
@@ -1179,14 +1620,10 @@ def update_attendance(attendance_id):
     """Update an attendance record (Admin only)"""
     data = request.get_json()
     
-    try:
-        attendance = attendance_collection.find_one({'_id': ObjectId(attendance_id)})
-    except:
+    attendance_oid = parse_object_id(attendance_id)
+    if attendance_oid is None:
         return jsonify({'error': 'Invalid attendance ID'}), 400
     
-    if not attendance:
-        return jsonify({'error': 'Attendance record not found'}), 404
-    
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'check_in_time' in data:
@@ -1200,20 +1637,21 @@ def update_attendance(attendance_id):
         update_data['check_out_time'] = data['check_out_time']
     
     if 'attendance_status' in data:
-        if data['attendance_status'] not in ['Present', 'Absent', 'Half-day']:
+        if data['attendance_status'] not in VALID_ATTENDANCE_STATUSES:
             return jsonify({'error': 'attendance_status must be Present, Absent, or Half-day'}), 400
         update_data['attendance_status'] = data['attendance_status']
     
-    attendance_collection.update_one(
-        {'_id': ObjectId(attendance_id)},
-        {'$set': update_data}
+    updated = attendance_collection.find_one_and_update(
+        {'_id': attendance_oid},
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated = attendance_collection.find_one({'_id': ObjectId(attendance_id)})
+    if not updated:
+        return jsonify({'error': 'Attendance record not found'}), 404
     
     return jsonify({
         'message': 'Attendance updated successfully',
-        'attendance': serialize_doc(updated)
+        'attendance': updated
     }), 200
 
 
@@ -1226,14 +1664,14 @@ def create_booking():
     data = request.get_json()
     customer_id = get_jwt_identity()
     
-    required_fields = ['service_id', 'date', 'time_slot']
-    is_valid, missing = validate_required_fields(data, required_fields)
+    is_valid, missing = validate_booking_fields(data)
     if not is_valid:
         return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     
     # Validate date format
-    if not validate_date_format(data['date']):
-        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    is_valid, error = validate('date', data['date'])
+    if not is_valid:
+        return jsonify({'error': error}), 400
     
     # Validate time slot format
     if not validate_time_slot(data['time_slot']):
@@ -1244,34 +1682,31 @@ def create_booking():
         return jsonify({'error': 'Booking must be for a future date and time'}), 400
     
     # Validate service exists and is active
-    try:
-        service = services_collection.find_one({'_id': ObjectId(data['service_id'])})
-    except:
+    service_oid = parse_object_id(data['service_id'])
+    if service_oid is None:
         return jsonify({'error': 'Invalid service ID'}), 400
     
+    service = services_collection.find_one(
+        {'_id': service_oid},
+        {'title': 1, 'base_price': 1, 'status': 1}
+    )
     if not service:
         return jsonify({'error': 'Service not found'}), 404
     
     if service.get('status') != 'Active':
         return jsonify({'error': 'Service is not available'}), 400
     
-    # Check for duplicate booking (same service, date, time slot)
-    existing_booking = bookings_collection.find_one({
-        'service_id': data['service_id'],
-        'date': data['date'],
-        'time_slot': data['time_slot'],
-        'status': {'$nin': ['Cancelled']}
-    })
-    
-    if existing_booking:
-        return jsonify({'error': 'This time slot is already booked'}), 409
-    
-    # Get customer details
-    customer = users_collection.find_one({'_id': ObjectId(customer_id)})
+    # Get customer details (from the token claims; older tokens without a name claim fall back to the DB)
+    claims = get_jwt()
+    if claims.get('name') and claims.get('email'):
+        customer = {'name': claims['name'], 'email': claims['email']}
+    else:
+        customer = users_collection.find_one({'_id': ObjectId(customer_id)}, {'name': 1, 'email': 1})
     
     # Calculate price
     final_price, discount_applied = calculate_booking_price(service)
     
+    now = datetime.utcnow()
     booking = {
         'customer_id': customer_id,
         'customer_name': customer['name'],
@@ -1285,13 +1720,26 @@ def create_booking():
         'discount_applied': discount_applied,
         'status': 'Pending',
         'notes': data.get('notes', ''),
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
+        'created_at': now,
+        'updated_at': now
     }
     
+    # A live booking for the same service/date/slot is rejected by the unique partial index;
+    # servers that could not build it get the check-then-insert fallback instead
+    if not booking_slot_index_active():
+        existing_booking = bookings_collection.find_one({
+            'service_id': data['service_id'],
+            'date': data['date'],
+            'time_slot': data['time_slot'],
+            'status': {'$nin': ['Cancelled']}
+        }, {'_id': 1})
+        if existing_booking:
+            return jsonify({'error': 'This time slot is already booked'}), 409
+    
     try:
         result = bookings_collection.insert_one(booking)
         booking['_id'] = result.inserted_id
+        invalidate_dashboard_cache()
         
         # Send confirmation email - COMMENTED OUT (will be added later)
         # send_booking_confirmation_email(
@@ -1306,7 +1754,7 @@ def create_booking():
         
         return jsonify({
             'message': 'Booking created successfully',
-            'booking': serialize_doc(booking)
+            'booking': booking
         }), 201
         
     except DuplicateKeyError:
@@ -1334,11 +1782,11 @@ def get_customer_bookings():
             date_range['$lte'] = date_to
         query['date'] = date_range
     
-    total = bookings_collection.count_documents(query)
-    cursor = bookings_collection.find(query).sort('date', -1).skip(skip).limit(limit)
-    bookings = list(cursor)
+    total = count_matching(bookings_collection, query)
+    cursor = bookings_collection.find(query).sort('date', -1).skip(skip).limit(limit).batch_size(limit)
     
-    return jsonify(paginated_response('bookings', serialize_docs(bookings), total, page, per_page)), 200
+    # ObjectId/datetime values are encoded by the orjson provider; no serialize_docs pass needed
+    return jsonify(paginated_response('bookings', list(cursor), total, page, per_page)), 200
 
 
 @app.route('/api/bookings/<booking_id>/cancel', methods=['PUT'])
@@ -1347,11 +1795,15 @@ def cancel_booking(booking_id):
     """Cancel a booking (Customer only)"""
     customer_id = get_jwt_identity()
     
-    try:
-        booking = bookings_collection.find_one({'_id': ObjectId(booking_id)})
-    except:
+    booking_oid = parse_object_id(booking_id)
+    if booking_oid is None:
         return jsonify({'error': 'Invalid booking ID'}), 400
     
+    # Fields for the ownership/status/time checks, plus those used by the cancellation email
+    booking = bookings_collection.find_one({'_id': booking_oid}, {
+        'customer_id': 1, 'status': 1, 'date': 1, 'time_slot': 1,
+        'customer_email': 1, 'customer_name': 1, 'service_title': 1
+    })
     if not booking:
         return jsonify({'error': 'Booking not found'}), 404
     
@@ -1369,9 +1821,10 @@ def cancel_booking(booking_id):
     
     # Update booking status
     bookings_collection.update_one(
-        {'_id': ObjectId(booking_id)},
+        {'_id': booking_oid},
         {'$set': {'status': 'Cancelled', 'updated_at': datetime.utcnow()}}
     )
+    invalidate_dashboard_cache()
     
     # Send cancellation email - COMMENTED OUT (will be added later)
     # send_booking_cancellation_email(
@@ -1416,26 +1869,26 @@ def get_all_bookings():
     if customer_id:
         query['customer_id'] = customer_id
     
-    total = bookings_collection.count_documents(query)
-    cursor = bookings_collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
-    bookings = list(cursor)
+    total = count_matching(bookings_collection, query)
+    cursor = bookings_collection.find(query).sort('created_at', -1).skip(skip).limit(limit).batch_size(limit)
     
-    return jsonify(paginated_response('bookings', serialize_docs(bookings), total, page, per_page)), 200
+    # ObjectId/datetime values are encoded by the orjson provider; no serialize_docs pass needed
+    return jsonify(paginated_response('bookings', list(cursor), total, page, per_page)), 200
 
 
 @app.route('/api/admin/bookings/<booking_id>', methods=['GET'])
 @admin_required
 def get_booking_details(booking_id):
     """Get booking details (Admin only)"""
-    try:
-        booking = bookings_collection.find_one({'_id': ObjectId(booking_id)})
-    except:
+    booking_oid = parse_object_id(booking_id)
+    if booking_oid is None:
         return jsonify({'error': 'Invalid booking ID'}), 400
     
+    booking = bookings_collection.find_one({'_id': booking_oid})
     if not booking:
         return jsonify({'error': 'Booking not found'}), 404
     
-    return jsonify({'booking': serialize_doc(booking)}), 200
+    return jsonify({'booking': booking}), 200
 
 
 @app.route('/api/admin/bookings/<booking_id>/status', methods=['PUT'])
@@ -1447,26 +1900,34 @@ def update_booking_status(booking_id):
     if 'status' not in data:
         return jsonify({'error': 'Status is required'}), 400
     
-    valid_statuses = ['Pending', 'Confirmed', 'Completed', 'Cancelled']
-    if data['status'] not in valid_statuses:
-        return jsonify({'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'}), 400
+    if data['status'] not in VALID_BOOKING_STATUSES:
+        return jsonify({'error': 'Invalid status. Must be one of: Pending, Confirmed, Completed, Cancelled'}), 400
     
-    try:
-        booking = bookings_collection.find_one({'_id': ObjectId(booking_id)})
-    except:
+    booking_oid = parse_object_id(booking_id)
+    if booking_oid is None:
         return jsonify({'error': 'Invalid booking ID'}), 400
     
+    new_status = data['status']
+    
+    # Update booking status; the pre-image gives us the old status in the same round-trip
+    try:
+        booking = bookings_collection.find_one_and_update(
+            {'_id': booking_oid},
+            {'$set': {'status': new_status, 'updated_at': datetime.utcnow()}},
+            projection={
+                'status': 1, 'date': 1, 'time_slot': 1,
+                'customer_email': 1, 'customer_name': 1, 'service_title': 1
+            },
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # Re-activating a cancelled booking whose slot has since been booked by someone else
+        return jsonify({'error': 'This time slot is already booked'}), 409
     if not booking:
         return jsonify({'error': 'Booking not found'}), 404
     
     old_status = booking['status']
-    new_status = data['status']
-    
-    # Update booking status
-    bookings_collection.update_one(
-        {'_id': ObjectId(booking_id)},
-        {'$set': {'status': new_status, 'updated_at': datetime.utcnow()}}
-    )
+    invalidate_dashboard_cache()
     
     # Send status update email if status changed - COMMENTED OUT (will be added later)
     # if old_status != new_status:
@@ -1487,23 +1948,65 @@ def update_booking_status(booking_id):
     }), 200
 
 
+@app.route('/api/admin/bookings/bulk-status', methods=['PUT'])
+@admin_required
+def bulk_update_booking_status():
+    """Update the status of several bookings in one request (Admin only)"""
+    data = request.get_json()
+    
+    is_valid, missing = validate_bulk_status_fields(data)
+    if not is_valid:
+        return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
+    
+    if not isinstance(data['ids'], list) or not data['ids']:
+        return jsonify({'error': 'ids must be a non-empty list of booking IDs'}), 400
+    
+    if data['status'] not in VALID_BOOKING_STATUSES:
+        return jsonify({'error': 'Invalid status. Must be one of: Pending, Confirmed, Completed, Cancelled'}), 400
+    
+    booking_oids = [parse_object_id(booking_id) for booking_id in data['ids']]
+    if None in booking_oids:
+        return jsonify({'error': 'Invalid booking ID'}), 400
+    
+    new_status = data['status']
+    now = datetime.utcnow()
+    update = {'$set': {'status': new_status, 'updated_at': now}}
+    
+    # One round-trip for all bookings; unordered so a slot conflict on one booking
+    # (e.g. re-activating a cancelled booking) doesn't stop the rest
+    operations = [UpdateOne({'_id': booking_oid}, update) for booking_oid in booking_oids]
+    try:
+        result = bookings_collection.bulk_write(operations, ordered=False)
+        matched, modified, failed = result.matched_count, result.modified_count, []
+    except BulkWriteError as e:
+        matched, modified = e.details['nMatched'], e.details['nModified']
+        failed = [str(booking_oids[error['index']]) for error in e.details['writeErrors']]
+    
+    if modified:
+        invalidate_dashboard_cache()
+    
+    return jsonify({
+        'message': f'{modified} booking(s) updated to {new_status}',
+        'matched': matched,
+        'modified': modified,
+        'failed_ids': failed
+    }), 200
+
+
 # ==================== DASHBOARD APIS (Admin) ====================
 
 @app.route('/api/admin/dashboard/summary', methods=['GET'])
 @admin_required
+@cache.cached(query_string=True, key_prefix=dashboard_cache_key_prefix)
 def get_dashboard_summary():
     """
     Single Admin Dashboard Summary API (per requirement 10.1).
     Returns: total bookings, today's bookings, confirmed, completed, cancelled,
              active services count, active staff count.
     """
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = today_str()
     
-    total_bookings = bookings_collection.count_documents({})
-    todays_bookings = bookings_collection.count_documents({'date': today})
-    confirmed_bookings = bookings_collection.count_documents({'status': 'Confirmed'})
-    completed_bookings = bookings_collection.count_documents({'status': 'Completed'})
-    cancelled_bookings = bookings_collection.count_documents({'status': 'Cancelled'})
+    booking_counts = get_booking_dashboard_counts(today)
     active_services_count = services_collection.count_documents({'status': 'Active'})
     active_staff_count = staff_collection.count_documents({
         'status': 'Active',
@@ -1511,11 +2014,11 @@ def get_dashboard_summary():
     })
     
     return jsonify({
-        'total_bookings': total_bookings,
-        'todays_bookings': todays_bookings,
-        'confirmed_bookings': confirmed_bookings,
-        'completed_bookings': completed_bookings,
-        'cancelled_bookings': cancelled_bookings,
+        'total_bookings': booking_counts['total'],
+        'todays_bookings': booking_counts['today'],
+        'confirmed_bookings': booking_counts['confirmed'],
+        'completed_bookings': booking_counts['completed'],
+        'cancelled_bookings': booking_counts['cancelled'],
         'active_services_count': active_services_count,
         'active_staff_count': active_staff_count
     }), 200
@@ -1523,51 +2026,42 @@ def get_dashboard_summary():
 
 @app.route('/api/admin/dashboard/stats', methods=['GET'])
 @admin_required
+@cache.cached(query_string=True, key_prefix=dashboard_cache_key_prefix)
 def get_dashboard_stats():
     """Get extended dashboard statistics (Admin only)"""
-    # Total counts
-    total_customers = users_collection.count_documents({'role': 'customer'})
-    total_services = services_collection.count_documents({})
-    total_active_services = services_collection.count_documents({'status': 'Active'})
-    total_bookings = bookings_collection.count_documents({})
-    active_staff_count = staff_collection.count_documents({
-        'status': 'Active',
-        '$or': [{'is_deleted': False}, {'is_deleted': {'$exists': False}}]
-    })
-    
-    # Booking status breakdown
-    pending_bookings = bookings_collection.count_documents({'status': 'Pending'})
-    confirmed_bookings = bookings_collection.count_documents({'status': 'Confirmed'})
-    completed_bookings = bookings_collection.count_documents({'status': 'Completed'})
-    cancelled_bookings = bookings_collection.count_documents({'status': 'Cancelled'})
-    
-    # Today's bookings
-    today = datetime.now().strftime("%Y-%m-%d")
-    todays_bookings = bookings_collection.count_documents({'date': today})
-    
-    # Revenue calculations
-    total_revenue_pipeline = [
-        {'$match': {'status': 'Completed'}},
-        {'$group': {'_id': None, 'total': {'$sum': '$final_price'}}}
-    ]
-    total_revenue_result = list(bookings_collection.aggregate(total_revenue_pipeline))
-    total_revenue = total_revenue_result[0]['total'] if total_revenue_result else 0
-    
-    # This month's revenue
-    first_day_of_month = datetime.now().replace(day=1).strftime("%Y-%m-%d")
-    monthly_revenue_pipeline = [
-        {'$match': {'status': 'Completed', 'date': {'$gte': first_day_of_month}}},
-        {'$group': {'_id': None, 'total': {'$sum': '$final_price'}}}
-    ]
-    monthly_revenue_result = list(bookings_collection.aggregate(monthly_revenue_pipeline))
-    monthly_revenue = monthly_revenue_result[0]['total'] if monthly_revenue_result else 0
-    
-    # Active discounts count
-    active_discounts = discounts_collection.count_documents({
-        'is_active': True,
-        'start_date': {'$lte': today},
-        'end_date': {'$gte': today}
-    })
+    today = today_str()
+    first_day_of_month = today[:8] + '01'
+    
+    # The queries are independent, so run them concurrently on the shared client's pool
+    futures = {
+        'total_customers': _dashboard_executor.submit(
+            users_collection.count_documents, {'role': 'customer'}
+        ),
+        'total_services': _dashboard_executor.submit(services_collection.estimated_document_count),
+        'total_active_services': _dashboard_executor.submit(
+            services_collection.count_documents, {'status': 'Active'}
+        ),
+        'active_staff_count': _dashboard_executor.submit(staff_collection.count_documents, {
+            'status': 'Active',
+            '$or': [{'is_deleted': False}, {'is_deleted': {'$exists': False}}]
+        }),
+        # Booking status breakdown, today's bookings and revenue (single aggregation)
+        'booking_counts': _dashboard_executor.submit(
+            get_booking_dashboard_counts, today, month_start=first_day_of_month
+        ),
+        'active_discounts': _dashboard_executor.submit(discounts_collection.count_documents, {
+            'is_active': True,
+            'start_date': {'$lte': today},
+            'end_date': {'$gte': today}
+        })
+    }
+    results = {name: future.result() for name, future in futures.items()}
+    total_customers = results['total_customers']
+    total_services = results['total_services']
+    total_active_services = results['total_active_services']
+    active_staff_count = results['active_staff_count']
+    booking_counts = results['booking_counts']
+    active_discounts = results['active_discounts']
     
     return jsonify({
         'customers': {
@@ -1581,16 +2075,16 @@ def get_dashboard_stats():
             'active': active_staff_count
         },
         'bookings': {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'completed': completed_bookings,
-            'cancelled': cancelled_bookings,
-            'today': todays_bookings
+            'total': booking_counts['total'],
+            'pending': booking_counts['pending'],
+            'confirmed': booking_counts['confirmed'],
+            'completed': booking_counts['completed'],
+            'cancelled': booking_counts['cancelled'],
+            'today': booking_counts['today']
         },
         'revenue': {
-            'total': round(total_revenue, 2),
-            'this_month': round(monthly_revenue, 2)
+            'total': round(booking_counts['revenue_total'], 2),
+            'this_month': round(booking_counts['revenue_this_month'], 2)
         },
         'discounts': {
             'active': active_discounts
@@ -1612,15 +2106,16 @@ def get_recent_bookings():
     if date_filter and validate_date_format(date_filter):
         query['date'] = date_filter
     
-    total = bookings_collection.count_documents(query)
-    cursor = bookings_collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
-    bookings = list(cursor)
+    total = count_matching(bookings_collection, query)
+    cursor = bookings_collection.find(query).sort('created_at', -1).skip(skip).limit(limit).batch_size(limit)
     
-    return jsonify(paginated_response('bookings', serialize_docs(bookings), total, page, per_page)), 200
+    # ObjectId/datetime values are encoded by the orjson provider; no serialize_docs pass needed
+    return jsonify(paginated_response('bookings', list(cursor), total, page, per_page)), 200
 
 
 @app.route('/api/admin/dashboard/revenue-by-service', methods=['GET'])
 @admin_required
+@cache.cached(query_string=True, key_prefix=dashboard_cache_key_prefix)
 def get_revenue_by_service():
     """Get revenue breakdown by service (Admin only)"""
     pipeline = [
@@ -1631,7 +2126,8 @@ def get_revenue_by_service():
             'total_revenue': {'$sum': '$final_price'},
             'booking_count': {'$sum': 1}
         }},
-        {'$sort': {'total_revenue': -1}}
+        {'$sort': {'total_revenue': -1}},
+        *service_title_lookup_stages()
     ]
     
     revenue_data = list(bookings_collection.aggregate(pipeline))
@@ -1648,11 +2144,14 @@ def get_revenue_by_service():
 
 @app.route('/api/admin/dashboard/bookings-by-date', methods=['GET'])
 @admin_required
+@cache.cached(query_string=True, key_prefix=dashboard_cache_key_prefix)
 def get_bookings_by_date():
     """Get bookings count by date for the last 30 days (Admin only)"""
     days = int(request.args.get('days', 30))
     start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
     
+    # Keep $match first: YYYY-MM-DD strings sort chronologically, so the range
+    # is answered by the (date, status) index instead of a collection scan
     pipeline = [
         {'$match': {'date': {'$gte': start_date}}},
         {'$group': {
@@ -1676,6 +2175,7 @@ def get_bookings_by_date():
 
 @app.route('/api/admin/dashboard/top-services', methods=['GET'])
 @admin_required
+@cache.cached(query_string=True, key_prefix=dashboard_cache_key_prefix)
 def get_top_services():
     """Get top services by booking count (Admin only)"""
     limit = int(request.args.get('limit', 5))
@@ -1687,7 +2187,8 @@ def get_top_services():
             'booking_count': {'$sum': 1}
         }},
         {'$sort': {'booking_count': -1}},
-        {'$limit': limit}
+        {'$limit': limit},
+        *service_title_lookup_stages()
     ]
     
     top_services = list(bookings_collection.aggregate(pipeline))
@@ -1720,41 +2221,6 @@ def health_check():
     }), 200
 
 
-# ==================== CORS ERROR HANDLING ====================
-
-@app.after_request
-def add_cors_headers_to_response(response):
-    """Ensure CORS headers are on every response - Allow all origins and ports."""
-    origin = request.headers.get('Origin')
-    
-    # Always allow all origins - no CORS errors
-    if 'Access-Control-Allow-Origin' not in response.headers:
-        if origin:
-            # Allow the requesting origin
-            response.headers['Access-Control-Allow-Origin'] = origin
-        else:
-            # If no origin header, allow all
-            response.headers['Access-Control-Allow-Origin'] = '*'
-    
-    # Set other CORS headers
-    if 'Access-Control-Allow-Headers' not in response.headers:
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, Accept'
-    if 'Access-Control-Allow-Methods' not in response.headers:
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-    if 'Access-Control-Max-Age' not in response.headers:
-        response.headers['Access-Control-Max-Age'] = '600'
-    # Note: Access-Control-Allow-Credentials is not set when using wildcard (browser security)
-    
-    return response
-
-
-@app.route('/api/<path:path>', methods=['OPTIONS'])
-@app.route('/api', methods=['OPTIONS'])
-def cors_preflight(path=None):
-    """Handle CORS preflight OPTIONS so preflight always gets 200 + CORS headers."""
-    return '', 204
-
-
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(400)
@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for the Salon Shop backend
+
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+import multiprocessing
+import os
+
+from pymongo.errors import DuplicateKeyError
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Requests spend most of their time waiting on MongoDB (and bcrypt, which releases the GIL),
+# so threaded workers let several requests overlap inside each process
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 30))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """Create the default admin user (python app.py does this on startup)"""
+    from app import init_admin
+
+    try:
+        init_admin()
+    except DuplicateKeyError:
+        # Another worker created it first
+        pass
@@ -1,68 +1,302 @@
 """
 Utility functions for Salon Shop Backend
-- Password hashing
+- Password hashing (bcrypt over a SHA-256 pre-hash; older plain-bcrypt hashes still
+  verify and are upgraded on the next successful login)
 - Email sending (SMTP)
 - Date/Time helpers
 - Price calculation
+- MongoDB helpers
 """
 
+import atexit
+import calendar
+import hashlib
+import hmac
 import os
+import re
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime
+import socket
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import email.policy
+from email.message import EmailMessage
+from datetime import datetime, timedelta
 import bcrypt
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # only needed when PASSWORD_HASH_BACKEND=argon2 or Argon2 hashes exist
+    PasswordHasher = None
+import orjson
+from jinja2 import Environment
+from markupsafe import escape
 from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
 
 
 # ==================== PASSWORD UTILITIES ====================
 
+# Algorithm for new hashes: 'bcrypt' (default) or 'argon2' (Argon2id, needs argon2-cffi).
+# verify_password recognises both formats, so the backend can be switched at any time.
+PASSWORD_HASH_BACKEND = os.getenv('PASSWORD_HASH_BACKEND', 'bcrypt').lower()
+if PASSWORD_HASH_BACKEND not in ('bcrypt', 'argon2'):
+    raise ValueError(f"PASSWORD_HASH_BACKEND must be 'bcrypt' or 'argon2', not {PASSWORD_HASH_BACKEND!r}")
+
+# bcrypt cost factor for new hashes; existing hashes keep the cost they were created with
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+
+ARGON2_PREFIX = '$argon2'
+if PasswordHasher is not None:
+    _argon2_hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=2)
+elif PASSWORD_HASH_BACKEND == 'argon2':
+    raise ImportError("PASSWORD_HASH_BACKEND=argon2 requires the argon2-cffi package")
+else:
+    _argon2_hasher = None
+
+
+# Marks hashes made from the SHA-256 pre-hash; unmarked hashes are plain bcrypt (legacy)
+PREHASH_PREFIX = 'sha256'
+
+
+def _prehash(password: str) -> bytes:
+    """
+    SHA-256 hex digest of the password as bcrypt input
+    Fixed 64 bytes, so long passwords are no longer silently truncated at bcrypt's 72-byte limit
+    """
+    return hashlib.sha256(password.encode('utf-8')).hexdigest().encode('ascii')
+
+
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    """
+    Hash a password using the configured backend (PASSWORD_HASH_BACKEND)
+    Blocking, but bcrypt and argon2-cffi release the GIL so other request threads keep running
+    """
+    if PASSWORD_HASH_BACKEND == 'argon2':
+        return _argon2_hasher.hash(password)
+    salt = bcrypt.gensalt(BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(_prehash(password), salt)
+    return PREHASH_PREFIX + hashed.decode('utf-8')
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (any scheme)"""
+    if hashed_password.startswith(ARGON2_PREFIX):
+        if _argon2_hasher is None:
+            raise ImportError("argon2-cffi is required to verify Argon2 password hashes")
+        try:
+            return _argon2_hasher.verify(hashed_password, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    if not hashed_password.startswith(PREHASH_PREFIX):
+        return legacy_verify_password(password, hashed_password)
+    hashed = hashed_password[len(PREHASH_PREFIX):].encode('utf-8')
+    return hmac.compare_digest(bcrypt.hashpw(_prehash(password), hashed), hashed)
+
+
+def verify_password_batch(pairs: list, workers: int = None) -> list:
+    """
+    Verify many (password, hashed_password) pairs in parallel, for offline tooling
+    (migrations, password audits). Threads suffice: bcrypt and argon2-cffi release the GIL.
+    Returns a list of bools in input order
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=min(workers, len(pairs))) as executor:
+        return list(executor.map(lambda pair: verify_password(*pair), pairs))
+
+
+def legacy_verify_password(password: str, hashed_password: str) -> bool:
+    """Verify a password against a plain bcrypt hash from before pre-hashing"""
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
+def bcrypt_cost(hashed_password: str) -> int:
+    """Cost factor stored in a bcrypt hash ($2b$<cost>$...), with or without PREHASH_PREFIX"""
+    if hashed_password.startswith(PREHASH_PREFIX):
+        hashed_password = hashed_password[len(PREHASH_PREFIX):]
+    return int(hashed_password.split('$')[2])
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True if the hash should be replaced with hash_password() after a successful login:
+    hashes from the other backend, legacy (not pre-hashed) bcrypt hashes, and hashes whose
+    cost parameters differ from the current settings - so raising (or lowering) the cost,
+    or switching backend, rolls out to users as they log in
+    """
+    if PASSWORD_HASH_BACKEND == 'argon2':
+        return (not hashed_password.startswith(ARGON2_PREFIX)
+                or _argon2_hasher.check_needs_rehash(hashed_password))
+    if not hashed_password.startswith(PREHASH_PREFIX):
+        return True
+    return bcrypt_cost(hashed_password) != BCRYPT_ROUNDS
+
+
 # ==================== EMAIL UTILITIES ====================
 
-def send_email(to_email: str, subject: str, html_content: str) -> bool:
+SMTP_TIMEOUT = 30  # seconds; also bounds the liveness check on a reused connection
+SMTP_SEND_BUFFER = 64 * 1024  # bytes
+
+# CRLF line endings for the wire, and 7-bit safe bodies so servers without 8BITMIME accept them
+EMAIL_POLICY = email.policy.SMTP.clone(cte_type='7bit')
+
+
+class SMTPConnection:
     """
-    Send an email using SMTP
-    Returns True if successful, False otherwise
+    Logged-in SMTP session that can send many messages
+    Connects (STARTTLS + LOGIN) lazily and reconnects if the server dropped the session
     """
-    try:
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 from_email: str, from_name: str = 'Salon Shop'):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_email = from_email
+        self.from_name = from_name
+        self._server = None
+
+    @classmethod
+    def from_env(cls):
+        """Build a connection from the SMTP_* env vars, or None if they are incomplete"""
         smtp_server = os.getenv('SMTP_SERVER')
-        smtp_port = int(os.getenv('SMTP_PORT', 587))
         smtp_username = os.getenv('SMTP_USERNAME')
         smtp_password = os.getenv('SMTP_PASSWORD')
         from_email = os.getenv('SMTP_FROM_EMAIL')
-        from_name = os.getenv('SMTP_FROM_NAME', 'Salon Shop')
-
         if not all([smtp_server, smtp_username, smtp_password, from_email]):
+            return None
+        return cls(smtp_server, int(os.getenv('SMTP_PORT', 587)), smtp_username, smtp_password,
+                   from_email, os.getenv('SMTP_FROM_NAME', 'Salon Shop'))
+
+    @staticmethod
+    def _tune_socket(sock):
+        # Flush small command writes (and pipelined bursts) immediately instead of waiting on
+        # Nagle, and give the kernel room for a whole message body in one send
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SMTP_SEND_BUFFER)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        self._tune_socket(server.sock)
+        server.starttls()
+        # STARTTLS swaps server.sock for a TLS wrapper; set the options on it as well
+        self._tune_socket(server.sock)
+        server.login(self.username, self.password)
+        self._server = server
+
+    def _is_alive(self) -> bool:
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, to_email: str, msg: EmailMessage):
+        """Send an already-built message, (re)connecting first if needed"""
+        if self._server is None or not self._is_alive():
+            self.close()
+            self._connect()
+        # Flattened once, already CRLF-terminated (EMAIL_POLICY)
+        msg_bytes = msg.as_bytes()
+        if self._server.has_extn('pipelining'):
+            self._sendmail_pipelined(to_email, msg_bytes)
+        else:
+            self._server.sendmail(self.from_email, to_email, msg_bytes)
+
+    def _sendmail_pipelined(self, to_email: str, msg_bytes: bytes):
+        """
+        sendmail() for servers advertising PIPELINING (RFC 2920)
+        MAIL, RCPT and DATA go out in one write, saving two round-trips per message
+        """
+        server = self._server
+        server.send(
+            f"mail FROM:{smtplib.quoteaddr(self.from_email)}\r\n"
+            f"rcpt TO:{smtplib.quoteaddr(to_email)}\r\n"
+            "data\r\n"
+        )
+        mail_reply = server.getreply()
+        rcpt_reply = server.getreply()
+        data_reply = server.getreply()
+
+        if mail_reply[0] != 250 or rcpt_reply[0] not in (250, 251) or data_reply[0] != 354:
+            if data_reply[0] == 354:
+                # Non-compliant server accepted DATA anyway - terminate it before resetting
+                server.send(".\r\n")
+                server.getreply()
+            server.rset()
+            if mail_reply[0] != 250:
+                raise smtplib.SMTPSenderRefused(*mail_reply, self.from_email)
+            if rcpt_reply[0] not in (250, 251):
+                raise smtplib.SMTPRecipientsRefused({to_email: rcpt_reply})
+            raise smtplib.SMTPDataError(*data_reply)
+
+        # Same dot-stuffing and termination as SMTP.data()
+        body = smtplib._quote_periods(msg_bytes)
+        if body[-2:] != smtplib.bCRLF:
+            body += smtplib.bCRLF
+        server.send(body + b"." + smtplib.bCRLF)
+        code, resp = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+    def close(self):
+        """Quit the session; safe to call when not connected"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_smtp_local = threading.local()
+
+
+def _get_smtp():
+    """This thread's cached SMTPConnection (None if SMTP is not configured)"""
+    conn = getattr(_smtp_local, 'conn', None)
+    if conn is None:
+        conn = SMTPConnection.from_env()
+        if conn is not None:
+            _smtp_local.conn = conn
+            atexit.register(conn.close)
+    return conn
+
+
+def send_email(to_email: str, subject: str, html_content: str, conn: SMTPConnection = None) -> bool:
+    """
+    Send an email using SMTP
+    Uses the given connection, or this thread's cached one, so repeat sends skip the handshake
+    Returns True if successful, False otherwise
+    """
+    try:
+        conn = conn or _get_smtp()
+        if conn is None:
             print("SMTP configuration incomplete")
             return False
 
-        # Create message
-        msg = MIMEMultipart('alternative')
+        # Single-part HTML message - there is no plain-text alternative to wrap in a multipart
+        msg = EmailMessage(policy=EMAIL_POLICY)
         msg['Subject'] = subject
-        msg['From'] = f"{from_name} <{from_email}>"
+        msg['From'] = f"{conn.from_name} <{conn.from_email}>"
         msg['To'] = to_email
-
-        # Attach HTML content
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
+        msg.set_content(html_content, subtype='html')
 
         # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(from_email, to_email, msg.as_string())
+        conn.send(to_email, msg)
 
         print(f"Email sent successfully to {to_email}")
         return True
@@ -72,23 +306,53 @@ def send_email(to_email: str, subject: str, html_content: str) -> bool:
         return False
 
 
-def send_booking_confirmation_email(customer_email: str, customer_name: str, 
-                                     service_title: str, booking_date: str, 
-                                     booking_time: str, final_price: float,
-                                     booking_id: str) -> bool:
-    """Send booking confirmation email to customer"""
-    subject = "Booking Confirmation - Salon Shop"
-    html_content = f"""
+def _send_over_one_connection(messages: list) -> int:
+    """Send (to_email, subject, html_content) tuples over a single new SMTP session"""
+    conn = SMTPConnection.from_env()
+    if conn is None:
+        print("SMTP configuration incomplete")
+        return 0
+    with conn:
+        return sum(send_email(to_email, subject, html_content, conn=conn)
+                   for to_email, subject, html_content in messages)
+
+
+def send_bulk(messages: list, connections: int = 4) -> int:
+    """
+    Send (to_email, subject, html_content) tuples, spread over up to `connections`
+    SMTP sessions sending in parallel threads (smtplib releases the GIL on socket IO)
+    Returns the number of messages sent
+    """
+    connections = max(1, min(connections, len(messages)))
+    if connections == 1:
+        return _send_over_one_connection(messages)
+    batches = [messages[i::connections] for i in range(connections)]
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        return sum(executor.map(_send_over_one_connection, batches))
+
+
+# Email bodies are compiled once at import; autoescape keeps customer-supplied values out of the markup
+_email_templates = Environment(autoescape=True)
+
+
+def _compile_email_template(source: str):
+    """
+    Compile an email body once at import
+    Source indentation is stripped first - it only padded every sent (base64-encoded) email
+    """
+    return _email_templates.from_string(textwrap.dedent(source).strip() + "\n")
+
+_CONFIRMATION_TEMPLATE = _compile_email_template("""
     <!DOCTYPE html>
     <html>
     <head>
         <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; background-color: #f9f9f9; }}
-            .booking-details {{ background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-            .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background-color: #4CAF50; color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; background-color: #f9f9f9; }
+            .booking-details { background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }
+            .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
         </style>
     </head>
     <body>
@@ -97,16 +361,16 @@ def send_booking_confirmation_email(customer_email: str, customer_name: str,
                 <h1>Booking Confirmation</h1>
             </div>
             <div class="content">
-                <p>Dear {customer_name},</p>
+                <p>Dear {{ customer_name }},</p>
                 <p>Thank you for booking with us! Your appointment has been successfully created.</p>
                 
                 <div class="booking-details">
                     <h3>Booking Details:</h3>
-                    <p><strong>Booking ID:</strong> {booking_id}</p>
-                    <p><strong>Service:</strong> {service_title}</p>
-                    <p><strong>Date:</strong> {booking_date}</p>
-                    <p><strong>Time:</strong> {booking_time}</p>
-                    <p><strong>Total Price:</strong> ${final_price:.2f}</p>
+                    <p><strong>Booking ID:</strong> {{ booking_id }}</p>
+                    <p><strong>Service:</strong> {{ service_title }}</p>
+                    <p><strong>Date:</strong> {{ booking_date }}</p>
+                    <p><strong>Time:</strong> {{ booking_time }}</p>
+                    <p><strong>Total Price:</strong> ${{ "%.2f"|format(final_price) }}</p>
                     <p><strong>Status:</strong> Pending (Awaiting Confirmation)</p>
                 </div>
                 
@@ -120,33 +384,20 @@ def send_booking_confirmation_email(customer_email: str, customer_name: str,
         </div>
     </body>
     </html>
-    """
-    return send_email(customer_email, subject, html_content)
+    """)
 
 
-def send_booking_cancellation_email(customer_email: str, customer_name: str,
-                                     service_title: str, booking_date: str,
-                                     booking_time: str, booking_id: str,
-                                     cancelled_by: str = "customer") -> bool:
-    """Send booking cancellation email to customer"""
-    subject = "Booking Cancelled - Salon Shop"
-    
-    if cancelled_by == "admin":
-        cancel_message = "Your booking has been cancelled by the salon administrator."
-    else:
-        cancel_message = "Your booking has been successfully cancelled as per your request."
-    
-    html_content = f"""
+_CANCELLATION_TEMPLATE = _compile_email_template("""
     <!DOCTYPE html>
     <html>
     <head>
         <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background-color: #f44336; color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; background-color: #f9f9f9; }}
-            .booking-details {{ background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-            .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background-color: #f44336; color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; background-color: #f9f9f9; }
+            .booking-details { background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }
+            .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
         </style>
     </head>
     <body>
@@ -155,15 +406,15 @@ def send_booking_cancellation_email(customer_email: str, customer_name: str,
                 <h1>Booking Cancelled</h1>
             </div>
             <div class="content">
-                <p>Dear {customer_name},</p>
-                <p>{cancel_message}</p>
+                <p>Dear {{ customer_name }},</p>
+                <p>{{ cancel_message }}</p>
                 
                 <div class="booking-details">
                     <h3>Cancelled Booking Details:</h3>
-                    <p><strong>Booking ID:</strong> {booking_id}</p>
-                    <p><strong>Service:</strong> {service_title}</p>
-                    <p><strong>Date:</strong> {booking_date}</p>
-                    <p><strong>Time:</strong> {booking_time}</p>
+                    <p><strong>Booking ID:</strong> {{ booking_id }}</p>
+                    <p><strong>Service:</strong> {{ service_title }}</p>
+                    <p><strong>Date:</strong> {{ booking_date }}</p>
+                    <p><strong>Time:</strong> {{ booking_time }}</p>
                 </div>
                 
                 <p>We hope to see you again soon. Feel free to book another appointment at your convenience.</p>
@@ -175,46 +426,21 @@ def send_booking_cancellation_email(customer_email: str, customer_name: str,
         </div>
     </body>
     </html>
-    """
-    return send_email(customer_email, subject, html_content)
+    """)
 
 
-def send_booking_status_update_email(customer_email: str, customer_name: str,
-                                      service_title: str, booking_date: str,
-                                      booking_time: str, booking_id: str,
-                                      new_status: str) -> bool:
-    """Send booking status update email to customer"""
-    
-    status_colors = {
-        "Confirmed": "#4CAF50",
-        "Completed": "#2196F3",
-        "Cancelled": "#f44336",
-        "Pending": "#FF9800"
-    }
-    
-    status_messages = {
-        "Confirmed": "Great news! Your booking has been confirmed by the salon.",
-        "Completed": "Your service has been marked as completed. Thank you for visiting us!",
-        "Cancelled": "Your booking has been cancelled by the salon administrator.",
-        "Pending": "Your booking status has been updated to pending."
-    }
-    
-    color = status_colors.get(new_status, "#333")
-    message = status_messages.get(new_status, f"Your booking status has been updated to {new_status}.")
-    
-    subject = f"Booking {new_status} - Salon Shop"
-    html_content = f"""
+_STATUS_UPDATE_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
         <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background-color: {color}; color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; background-color: #f9f9f9; }}
-            .booking-details {{ background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-            .status-badge {{ display: inline-block; padding: 5px 15px; background-color: {color}; color: white; border-radius: 20px; }}
-            .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background-color: {{ color }}; color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; background-color: #f9f9f9; }
+            .booking-details { background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }
+            .status-badge { display: inline-block; padding: 5px 15px; background-color: {{ color }}; color: white; border-radius: 20px; }
+            .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
         </style>
     </head>
     <body>
@@ -223,16 +449,16 @@ def send_booking_status_update_email(customer_email: str, customer_name: str,
                 <h1>Booking Status Update</h1>
             </div>
             <div class="content">
-                <p>Dear {customer_name},</p>
-                <p>{message}</p>
+                <p>Dear {{ customer_name }},</p>
+                <p>{{ message }}</p>
                 
                 <div class="booking-details">
                     <h3>Booking Details:</h3>
-                    <p><strong>Booking ID:</strong> {booking_id}</p>
-                    <p><strong>Service:</strong> {service_title}</p>
-                    <p><strong>Date:</strong> {booking_date}</p>
-                    <p><strong>Time:</strong> {booking_time}</p>
-                    <p><strong>New Status:</strong> <span class="status-badge">{new_status}</span></p>
+                    <p><strong>Booking ID:</strong> {{ booking_id }}</p>
+                    <p><strong>Service:</strong> {{ service_title }}</p>
+                    <p><strong>Date:</strong> {{ booking_date }}</p>
+                    <p><strong>Time:</strong> {{ booking_time }}</p>
+                    <p><strong>New Status:</strong> <span class="status-badge">{{ new_status }}</span></p>
                 </div>
                 
                 <p>If you have any questions, please contact us.</p>
@@ -245,32 +471,164 @@ def send_booking_status_update_email(customer_email: str, customer_name: str,
     </body>
     </html>
     """
-    return send_email(customer_email, subject, html_content)
+
+_STATUS_COLORS = {
+    "Confirmed": "#4CAF50",
+    "Completed": "#2196F3",
+    "Cancelled": "#f44336",
+    "Pending": "#FF9800"
+}
+
+_STATUS_MESSAGES = {
+    "Confirmed": "Great news! Your booking has been confirmed by the salon.",
+    "Completed": "Your service has been marked as completed. Thank you for visiting us!",
+    "Cancelled": "Your booking has been cancelled by the salon administrator.",
+    "Pending": "Your booking status has been updated to pending."
+}
+
+# Generic template for unexpected statuses
+_STATUS_UPDATE_TEMPLATE = _compile_email_template(_STATUS_UPDATE_HTML)
+
+# Known statuses get a template with their colour, message and label already filled in,
+# leaving only the booking fields to render per email
+_STATUS_UPDATE_TEMPLATES = {
+    status: _compile_email_template(
+        _STATUS_UPDATE_HTML
+        .replace('{{ color }}', color)
+        .replace('{{ message }}', str(escape(_STATUS_MESSAGES[status])))
+        .replace('{{ new_status }}', status)
+    )
+    for status, color in _STATUS_COLORS.items()
+}
+
+
+def send_booking_confirmation_email(customer_email: str, customer_name: str, 
+                                     service_title: str, booking_date: str, 
+                                     booking_time: str, final_price: float,
+                                     booking_id: str, conn: SMTPConnection = None) -> bool:
+    """Send booking confirmation email to customer"""
+    subject = "Booking Confirmation - Salon Shop"
+    html_content = _CONFIRMATION_TEMPLATE.render(
+        customer_name=customer_name,
+        service_title=service_title,
+        booking_date=booking_date,
+        booking_time=booking_time,
+        final_price=final_price,
+        booking_id=booking_id
+    )
+    return send_email(customer_email, subject, html_content, conn=conn)
+
+
+def send_booking_cancellation_email(customer_email: str, customer_name: str,
+                                     service_title: str, booking_date: str,
+                                     booking_time: str, booking_id: str,
+                                     cancelled_by: str = "customer",
+                                     conn: SMTPConnection = None) -> bool:
+    """Send booking cancellation email to customer"""
+    subject = "Booking Cancelled - Salon Shop"
+    
+    if cancelled_by == "admin":
+        cancel_message = "Your booking has been cancelled by the salon administrator."
+    else:
+        cancel_message = "Your booking has been successfully cancelled as per your request."
+    
+    html_content = _CANCELLATION_TEMPLATE.render(
+        customer_name=customer_name,
+        cancel_message=cancel_message,
+        service_title=service_title,
+        booking_date=booking_date,
+        booking_time=booking_time,
+        booking_id=booking_id
+    )
+    return send_email(customer_email, subject, html_content, conn=conn)
+
+
+def send_booking_status_update_email(customer_email: str, customer_name: str,
+                                      service_title: str, booking_date: str,
+                                      booking_time: str, booking_id: str,
+                                      new_status: str, conn: SMTPConnection = None) -> bool:
+    """Send booking status update email to customer"""
+    subject = f"Booking {new_status} - Salon Shop"
+    booking_fields = {
+        'customer_name': customer_name,
+        'service_title': service_title,
+        'booking_date': booking_date,
+        'booking_time': booking_time,
+        'booking_id': booking_id
+    }
+    
+    template = _STATUS_UPDATE_TEMPLATES.get(new_status)
+    if template is not None:
+        html_content = template.render(booking_fields)
+    else:
+        html_content = _STATUS_UPDATE_TEMPLATE.render(
+            booking_fields,
+            color="#333",
+            message=f"Your booking status has been updated to {new_status}.",
+            new_status=new_status
+        )
+    return send_email(customer_email, subject, html_content, conn=conn)
 
 
 # ==================== DATE/TIME UTILITIES ====================
 
 def parse_date(date_str: str) -> datetime:
-    """Parse date string to datetime object (format: YYYY-MM-DD)"""
-    return datetime.strptime(date_str, "%Y-%m-%d")
+    """
+    Parse date string to datetime object (format: YYYY-MM-DD)
+    Splits and builds the datetime directly - much cheaper than strptime for a fixed format
+    """
+    year, month, day = date_str.split('-')
+    return datetime(int(year), int(month), int(day))
 
 
 def parse_time(time_str: str) -> datetime:
     """Parse time string to datetime object (format: HH:MM)"""
-    return datetime.strptime(time_str, "%H:%M")
+    hour, minute = time_str.split(':')
+    return datetime(1900, 1, 1, int(hour), int(minute))
 
 
 def combine_date_time(date_str: str, time_str: str) -> datetime:
     """Combine date and time strings into a single datetime object"""
-    date_obj = parse_date(date_str)
-    time_obj = parse_time(time_str)
-    return datetime.combine(date_obj.date(), time_obj.time())
+    year, month, day = date_str.split('-')
+    hour, minute = time_str.split(':')
+    return datetime(int(year), int(month), int(day), int(hour), int(minute))
 
 
-def is_future_datetime(date_str: str, time_str: str) -> bool:
-    """Check if the given date and time is in the future"""
-    booking_datetime = combine_date_time(date_str, time_str)
-    return booking_datetime > datetime.now()
+def is_future_datetime(date_str: str, time_str: str, now: datetime = None) -> bool:
+    """
+    Check if the given date and time (local time) is in the future
+    Zero-padded ISO dates sort as strings, so only same-day checks need the clock time;
+    the clock is read with time.localtime()/time.time() rather than building datetimes
+    """
+    if now is not None:
+        return combine_date_time(date_str, time_str) > now
+    hour, minute = time_str.split(':')
+    if len(date_str) == 10:
+        today = today_str()
+        if date_str != today:
+            return date_str > today
+        clock = time.localtime()
+        return (int(hour), int(minute)) > (clock.tm_hour, clock.tm_min)
+    # Unpadded legacy dates: compare as a local timestamp
+    year, month, day = date_str.split('-')
+    booking_ts = time.mktime((int(year), int(month), int(day), int(hour), int(minute), 0, 0, 0, -1))
+    return booking_ts > time.time()
+
+
+_today_cache = {'date': None, 'expires': 0.0}
+
+
+def today_str() -> str:
+    """
+    Today's local date as YYYY-MM-DD
+    Cached until the next local midnight so hot paths skip strftime
+    """
+    if time.time() >= _today_cache['expires']:
+        now = datetime.now()
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        _today_cache['date'] = now.strftime("%Y-%m-%d")
+        _today_cache['expires'] = next_midnight.timestamp()
+    return _today_cache['date']
 
 
 def format_date(date_obj: datetime) -> str:
@@ -306,49 +664,93 @@ def calculate_discounted_price(base_price: float, discount_type: str,
 
 
 def is_discount_active(start_date: str, end_date: str) -> bool:
-    """Check if a discount is currently active based on dates"""
+    """
+    Check if a discount is currently active based on dates
+    Zero-padded ISO dates compare correctly as strings, so no parsing is needed
+    """
+    if len(start_date) == 10 and len(end_date) == 10:
+        return start_date <= today_str() <= end_date
     today = datetime.now().date()
-    start = parse_date(start_date).date()
-    end = parse_date(end_date).date()
-    return start <= today <= end
+    return parse_date(start_date).date() <= today <= parse_date(end_date).date()
 
 
 # ==================== MONGODB UTILITIES ====================
 
+# Leaf types that need converting for JSON, looked up by exact type
+_SCALAR_SERIALIZERS = {
+    ObjectId: str,
+    datetime: datetime.isoformat,
+}
+
+
 def serialize_doc(doc: dict) -> dict:
-    """Convert MongoDB document to JSON-serializable format"""
+    """
+    Convert MongoDB document to JSON-serializable format
+    Only needed when a plain dict is required - responses can use to_json_bytes on the raw doc
+    Walks nested dicts/lists with an explicit stack instead of recursion
+    """
     if doc is None:
         return None
     
     result = {}
-    for key, value in doc.items():
-        if isinstance(value, ObjectId):
-            result[key] = str(value)
-        elif isinstance(value, datetime):
-            result[key] = value.isoformat()
-        elif isinstance(value, dict):
-            result[key] = serialize_doc(value)
-        elif isinstance(value, list):
-            result[key] = [serialize_doc(item) if isinstance(item, dict) else 
-                          str(item) if isinstance(item, ObjectId) else item 
-                          for item in value]
-        else:
-            result[key] = value
+    stack = [(doc, result)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(target, dict) else enumerate(source)
+        for key, value in items:
+            kind = type(value)
+            if kind is dict:
+                converted = {}
+                stack.append((value, converted))
+            elif kind is list:
+                converted = [None] * len(value)
+                stack.append((value, converted))
+            else:
+                convert = _SCALAR_SERIALIZERS.get(kind)
+                converted = convert(value) if convert else value
+            target[key] = converted
     return result
 
 
-def serialize_docs(docs: list) -> list:
-    """Convert list of MongoDB documents to JSON-serializable format"""
+def serialize_docs(docs) -> list:
+    """Convert MongoDB documents (list or cursor) to JSON-serializable format"""
     return [serialize_doc(doc) for doc in docs]
 
 
+def to_json_bytes(obj) -> bytes:
+    """
+    Encode raw MongoDB documents (or anything containing them) as JSON in one pass
+    orjson handles datetimes natively; ObjectIds and other BSON types fall back to str()
+    """
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def bulk_insert(collection, docs: list, batch_size: int = 1000) -> int:
+    """
+    Insert many documents using unordered bulk_write batches (one round-trip per batch)
+    Duplicate-key failures do not stop the rest of the batch
+    Returns the number of documents inserted
+    """
+    inserted = 0
+    for start in range(0, len(docs), batch_size):
+        batch = docs[start:start + batch_size]
+        try:
+            result = collection.bulk_write([InsertOne(doc) for doc in batch], ordered=False)
+            inserted += result.inserted_count
+        except BulkWriteError as e:
+            inserted += e.details.get('nInserted', 0)
+    return inserted
+
+
 # ==================== VALIDATION UTILITIES ====================
 
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+DATE_PATTERN = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+
 def validate_email(email: str) -> bool:
     """Basic email validation"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.fullmatch(email) is not None
 
 
 def validate_required_fields(data: dict, required_fields: list) -> tuple:
@@ -360,17 +762,63 @@ def validate_required_fields(data: dict, required_fields: list) -> tuple:
     return (len(missing) == 0, missing)
 
 
+def make_required_validator(required_fields) -> callable:
+    """
+    Build validate_required_fields specialised to one fixed field list
+    Declare once at import for a request schema, then call with just the data
+    """
+    fields = tuple(required_fields)
+
+    def validate(data: dict) -> tuple:
+        if not isinstance(data, dict):
+            # A JSON body that is not an object (list, string, number) has none of the fields
+            return (False, list(fields))
+        missing = [field for field in fields if data.get(field) in (None, "")]
+        return (not missing, missing)
+
+    return validate
+
+
 def validate_time_slot(time_str: str) -> bool:
-    """Validate time slot format (HH:MM)"""
-    import re
-    pattern = r'^([01]?[0-9]|2[0-3]):[0-5][0-9]$'
-    return re.match(pattern, time_str) is not None
+    """
+    Validate time slot format (HH:MM, hour may be a single digit)
+    Plain string checks instead of a regex - this runs on every booking and attendance write
+    """
+    hours, sep, minutes = time_str.partition(':')
+    return (
+        bool(sep)
+        and 1 <= len(hours) <= 2 and len(minutes) == 2
+        and hours.isascii() and hours.isdigit()
+        and minutes.isascii() and minutes.isdigit()
+        and int(hours) <= 23 and int(minutes) <= 59
+    )
 
 
+@lru_cache(maxsize=4096)
 def validate_date_format(date_str: str) -> bool:
-    """Validate date format (YYYY-MM-DD)"""
-    try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-        return True
-    except ValueError:
+    """Validate date format (YYYY-MM-DD, zero-padded so stored dates sort as strings)"""
+    if DATE_PATTERN.fullmatch(date_str) is None:
         return False
+    # Range checks on the already-matched digits reject dates such as 2024-13-01 or 2024-02-30
+    # without raising and catching ValueError
+    year, month, day = int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])
+    return year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
+
+# kind -> (check, error message) for validate()
+_VALIDATORS = {
+    'email': (validate_email, 'Invalid email format'),
+    'date': (validate_date_format, 'Invalid date format. Use YYYY-MM-DD'),
+    'time': (validate_time_slot, 'Invalid time format. Use HH:MM'),
+}
+
+
+def validate(kind: str, value: str) -> tuple:
+    """
+    Validate a value as 'email', 'date' or 'time'
+    Returns (is_valid, error_message) - error_message is None when valid
+    """
+    check, error = _VALIDATORS[kind]
+    if check(value):
+        return (True, None)
+    return (False, error)